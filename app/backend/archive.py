@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, Table, delete, exists, func, insert, select, text
+
+from app.backend.config import settings
+from app.backend.db import Base, async_session_maker
+from app.models.archive import ARCHIVED_WITH, archives
+from app.models.changes import catalog_change_seq, current_txid
+
+logger = logging.getLogger(__name__)
+
+
+def live_references(table: Table, carried: list[Column] = ()) -> list:
+    conditions = []
+    for referencing in Base.metadata.sorted_tables:
+        for fk in referencing.foreign_keys:
+            if fk.column.table is table and not any(fk.parent is column for column in carried):
+                # An alias keeps the subquery correlated for self-references such as categories.parent_id.
+                ref = referencing.alias()
+                conditions.append(~exists().where(ref.c[fk.parent.name] == table.c.id))
+    return conditions
+
+
+def move_rows(source: Table, target: Table, where: list):
+    # Either direction: archived_at exists only in the archive table and is left to its default.
+    names = [column.name for column in target.c if column.name in source.c]
+    moved = delete(source).where(*where).returning(*[source.c[name] for name in names]).cte("moved")
+    return insert(target).from_select(names, select(*[moved.c[name] for name in names])).add_cte(moved)
+
+
+async def move(source: Table, target: Table, where: list, carried: list[Column] = ()) -> int:
+    """Move up to one batch of rows, and the rows carried with them, in its own short transaction."""
+    ids = (select(source.c.id).where(*where)
+           .order_by(source.c.id)
+           .limit(settings.ARCHIVE_BATCH_SIZE)
+           .with_for_update(skip_locked=True))
+
+    async with async_session_maker() as session:
+        await session.execute(text(f"SET LOCAL lock_timeout = '{settings.ARCHIVE_LOCK_TIMEOUT}'"))
+        batch = (await session.scalars(ids)).all()
+        if batch:
+            for column in carried:
+                dependent, dependent_archive = archives[column.table.name]
+                await session.execute(move_rows(dependent, dependent_archive, [column.in_(batch)]))
+            await session.execute(move_rows(source, target, [source.c.id.in_(batch)]))
+        await session.commit()
+        return len(batch)
+
+
+async def archive_table(name: str, cutoff: datetime) -> int:
+    live, archive = archives[name]
+    carried = ARCHIVED_WITH.get(name, [])
+    where = [live.c.is_active.is_(False), live.c.deleted_at < cutoff, *live_references(live, carried)]
+    total = 0
+    while True:
+        moved = await move(live, archive, where, carried)
+        total += moved
+        if moved < settings.ARCHIVE_BATCH_SIZE:
+            return total
+        await asyncio.sleep(0)
+
+
+async def run_archival() -> dict[str, int]:
+    cutoff = datetime.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    result = {}
+    for name in archives:
+        try:
+            result[name] = await archive_table(name, cutoff)
+        except Exception:
+            # One failing table must not keep the rest from being archived.
+            logger.exception("Archiving %s failed", name)
+            result[name] = 0
+            continue
+        if result[name]:
+            logger.info("Archived %s rows from %s", result[name], name)
+    return result
+
+
+async def restore(name: str, ids: list[int]) -> int:
+    """Move archived rows back into the live table; they stay soft-deleted until reactivated.
+
+    Tracked rows get a new change cursor, so changes feed clients see them again as tombstones.
+    Rows archived along with them (ARCHIVED_WITH) come back in the same transaction.
+    """
+    live, archive = archives[name]
+    names = [column.name for column in live.c]
+    moved = delete(archive).where(archive.c.id.in_(ids)).returning(*[archive.c[n] for n in names]).cte("moved")
+    values = {n: moved.c[n] for n in names}
+    if "change_seq" in values:
+        values.update(change_seq=catalog_change_seq.next_value(), change_txid=current_txid,
+                      updated_at=func.clock_timestamp())
+    query = insert(live).from_select(names, select(*values.values())).add_cte(moved)
+
+    async with async_session_maker() as session:
+        result = await session.execute(query)
+        # Reverse order of archiving, so every row comes back after the rows it references.
+        for column in reversed(ARCHIVED_WITH.get(name, [])):
+            dependent, dependent_archive = archives[column.table.name]
+            await session.execute(move_rows(dependent_archive, dependent, [dependent_archive.c[column.name].in_(ids)]))
+        await session.commit()
+        return result.rowcount
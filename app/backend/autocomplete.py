@@ -0,0 +1,236 @@
+import asyncio
+import re
+import sys
+from bisect import bisect_left
+from dataclasses import dataclass
+
+import numpy as np
+
+from sqlalchemy import select
+
+from app.backend import events
+from app.backend.config import settings
+from app.backend.db import async_session_maker
+from app.models.category import Category
+from app.models.products import Product
+
+_TOKEN = re.compile(r"\w+")
+
+# Internal events topic carrying index writes to every worker; no client subscribes to it.
+TOPIC = "internal:autocomplete"
+WRITES = frozenset({"upsert", "set_weight", "remove"})
+
+
+def tokenize(text: str | None) -> list[str]:
+    return [sys.intern(token) for token in dict.fromkeys(_TOKEN.findall((text or "").casefold()))]
+
+
+@dataclass(slots=True)
+class Document:
+    name: str
+    slug: str
+    tokens: tuple[str, ...]
+
+
+class PrefixIndex:
+    """Sorted (token, id) pairs searched with bisect, so a prefix lookup is a binary search plus a scan of the matches.
+
+    Tokens are a sorted list of interned strings with a parallel int64 array of ids; weights live in an
+    array indexed by id, so ranking the matches of a prefix is vectorized. Every word of a name is indexed,
+    so "pro" finds "iPhone 15 Pro". Results for a prefix are cached until a write touches a token starting with it.
+    """
+
+    def __init__(self, limit: int, cache_size: int):
+        self.limit = limit
+        self.cache_size = cache_size
+        self.tokens: list[str] = []
+        self.ids = np.empty(0, dtype=np.int64)
+        self.weights = np.zeros(0)
+        self.documents: dict[int, Document] = {}
+        self.cache: dict[str, list[int]] = {}
+
+    @classmethod
+    def build(cls, rows, limit: int, cache_size: int) -> "PrefixIndex":
+        index = cls(limit, cache_size)
+        pairs = []
+        index._reserve(max((row[0] for row in rows), default=0))
+        for document_id, name, slug, weight in rows:
+            tokens = tuple(tokenize(name))
+            index.documents[document_id] = Document(name, slug, tokens)
+            index.weights[document_id] = weight or 0.0
+            pairs.extend((token, document_id) for token in tokens)
+        pairs.sort()
+        index.tokens = [token for token, _ in pairs]
+        index.ids = np.fromiter((document_id for _, document_id in pairs), dtype=np.int64, count=len(pairs))
+        return index
+
+    def _reserve(self, document_id: int):
+        if document_id >= len(self.weights):
+            weights = np.zeros(max(document_id + 1, 2 * len(self.weights)))
+            weights[:len(self.weights)] = self.weights
+            self.weights = weights
+
+    def _invalidate(self, tokens):
+        for token in tokens:
+            for end in range(1, len(token) + 1):
+                self.cache.pop(token[:end], None)
+
+    def _insert(self, document_id: int, tokens):
+        for token in tokens:
+            position = bisect_left(self.tokens, token)
+            while position < len(self.tokens) and self.tokens[position] == token and self.ids[position] < document_id:
+                position += 1
+            self.tokens.insert(position, token)
+            self.ids = np.insert(self.ids, position, document_id)
+
+    def _delete(self, document_id: int, tokens):
+        for token in tokens:
+            position = bisect_left(self.tokens, token)
+            while position < len(self.tokens) and self.tokens[position] == token:
+                if self.ids[position] == document_id:
+                    del self.tokens[position]
+                    self.ids = np.delete(self.ids, position)
+                    break
+                position += 1
+
+    def upsert(self, document_id: int, name: str, slug: str, weight: float | None = None):
+        previous = self.documents.get(document_id)
+        tokens = tuple(tokenize(name))
+        old_tokens = previous.tokens if previous else ()
+        self._delete(document_id, [token for token in old_tokens if token not in tokens])
+        self._insert(document_id, [token for token in tokens if token not in old_tokens])
+        self.documents[document_id] = Document(name, slug, tokens)
+        self._reserve(document_id)
+        if weight is not None or previous is None:
+            self.weights[document_id] = weight or 0.0
+        self._invalidate(set(old_tokens) | set(tokens))
+
+    def set_weight(self, document_id: int, weight: float):
+        document = self.documents.get(document_id)
+        if document is None or self.weights[document_id] == weight:
+            return
+        self.weights[document_id] = weight
+        self._invalidate(document.tokens)
+
+    def weight(self, document_id: int) -> float:
+        return float(self.weights[document_id])
+
+    def remove(self, document_id: int):
+        document = self.documents.pop(document_id, None)
+        if document is not None:
+            self._delete(document_id, document.tokens)
+            self.weights[document_id] = 0.0
+            self._invalidate(document.tokens)
+
+    def _matching(self, prefix: str) -> np.ndarray:
+        """Boolean mask over ids of documents with a word starting with the prefix."""
+        start = bisect_left(self.tokens, prefix)
+        # Every token starting with the prefix sorts before prefix + the largest code point.
+        stop = bisect_left(self.tokens, prefix + "\U0010ffff", start)
+        mask = np.zeros(len(self.weights), dtype=bool)
+        mask[self.ids[start:stop]] = True
+        return mask
+
+    def _best(self, mask: np.ndarray, limit: int) -> list[int]:
+        # Highest weight first, lower id on ties; partitioning keeps this linear in the number of matches.
+        candidates = np.flatnonzero(mask)
+        weights = self.weights[candidates]
+        if len(candidates) > limit:
+            threshold = np.partition(weights, len(weights) - limit)[len(weights) - limit]
+            above = candidates[weights > threshold]
+            candidates = np.concatenate([above, candidates[weights == threshold][:limit - len(above)]])
+            weights = self.weights[candidates]
+        return candidates[np.lexsort((candidates, -weights))].tolist()
+
+    def search(self, query: str, limit: int) -> list[int]:
+        words = tokenize(query)
+        if not words:
+            return []
+        # The last word is still being typed; earlier words must each prefix some word of the name.
+        *complete, partial = words
+        if complete:
+            mask = self._matching(partial)
+            for word in complete:
+                mask &= self._matching(word)
+            return self._best(mask, limit)
+
+        cached = self.cache.get(partial)
+        if cached is None:
+            cached = self._best(self._matching(partial), self.limit)
+            if len(self.cache) >= self.cache_size:
+                self.cache.pop(next(iter(self.cache)))
+            self.cache[partial] = cached
+        return cached[:limit]
+
+    def memory(self) -> int:
+        """Approximate bytes held by the index: the token list and its distinct strings, both arrays and the documents."""
+        size = sys.getsizeof(self.tokens) + self.ids.nbytes + self.weights.nbytes + sys.getsizeof(self.documents)
+        size += sum(sys.getsizeof(token) for token in set(self.tokens))
+        for document_id, document in self.documents.items():
+            size += (sys.getsizeof(document_id) + sys.getsizeof(document) + sys.getsizeof(document.name)
+                     + sys.getsizeof(document.slug) + sys.getsizeof(document.tokens))
+        return size
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self.documents),
+            "entries": len(self.tokens),
+            "distinct_tokens": len(set(self.tokens)),
+            "cached_prefixes": len(self.cache),
+            "bytes": self.memory(),
+        }
+
+
+products = PrefixIndex(settings.AUTOCOMPLETE_LIMIT, settings.AUTOCOMPLETE_CACHE_SIZE)
+categories = PrefixIndex(settings.AUTOCOMPLETE_LIMIT, settings.AUTOCOMPLETE_CACHE_SIZE)
+
+# Writes applied while refresh() rebuilds the indexes; replayed onto the new ones before the swap.
+_pending: list | None = None
+
+
+def apply(index: str, method: str, *args):
+    """Apply one write, e.g. ``("products", "upsert", id, name, slug)``, to this worker's index."""
+    if method not in WRITES:
+        raise ValueError(f"Unknown autocomplete write {method!r}")
+    getattr(products if index == "products" else categories, method)(*args)
+    if _pending is not None:
+        _pending.append((index, method, args))
+
+
+async def publish(index: str, method: str, *args):
+    """Send a write to every worker, this one included; call it after the transaction has committed."""
+    await events.publish([TOPIC], "autocomplete.write", {"index": index, "method": method, "args": list(args)})
+
+
+def on_write(message: dict):
+    data = message["data"]
+    apply(data["index"], data["method"], *data["args"])
+
+
+events.hub.listen(TOPIC, on_write)
+
+
+async def refresh():
+    global products, categories, _pending
+    if _pending is not None:
+        return
+    # Recording starts before the rows are read, so a write either is in them or gets replayed.
+    _pending = []
+    try:
+        async with async_session_maker() as session:
+            product_rows = (await session.execute(
+                select(Product.id, Product.name, Product.slug, Product.rating).where(Product.is_active))).all()
+            category_rows = (await session.execute(
+                select(Category.id, Category.name, Category.slug).where(Category.is_active))).all()
+
+        # Built in a thread and swapped in whole, so lookups never see a half-built index.
+        new_products = await asyncio.to_thread(
+            PrefixIndex.build, product_rows, settings.AUTOCOMPLETE_LIMIT, settings.AUTOCOMPLETE_CACHE_SIZE)
+        new_categories = await asyncio.to_thread(
+            PrefixIndex.build, [(*row, 0.0) for row in category_rows],
+            settings.AUTOCOMPLETE_LIMIT, settings.AUTOCOMPLETE_CACHE_SIZE)
+        for index, method, args in _pending:
+            getattr(new_products if index == "products" else new_categories, method)(*args)
+        products, categories = new_products, new_categories
+    finally:
+        _pending = None
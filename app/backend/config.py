@@ -15,6 +15,74 @@ class AppSettings(BaseSettings):
     JWT_KEY: str
     JWT_ALGORITHM: str
 
+    SQL_ECHO: bool = False
+    SLOW_QUERY_MS: float = 100
+    QUERY_SAMPLE_RATE: float = 0.01
+    QUERY_STATS_MAX: int = 500
+    SLOW_QUERY_EXPLAIN: bool = False
+    SLOW_QUERY_EXPLAIN_TOP: int = 10
+
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_RETENTION: float = 7 * 24 * 3600
+    OUTBOX_PURGE_BATCH: int = 1000
+    OUTBOX_PURGE_INTERVAL: float = 3600
+
+    IMAGE_STORAGE: str = "local"
+    IMAGE_ROOT: str = "media"
+    IMAGE_S3_BUCKET: str = ""
+    IMAGE_S3_ENDPOINT: str | None = None
+    IMAGE_PUBLIC_URL: str = ""
+    IMAGE_MAX_BYTES: int = 10 * 1024 * 1024
+    IMAGE_WORKERS: int = 2
+    THUMBNAIL_SIZES: list[int] = [160, 480, 960]
+
+    ARCHIVE_AFTER_DAYS: int = 30
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_INTERVAL: float = 3600
+    ARCHIVE_LOCK_TIMEOUT: str = "2s"
+
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_OFFLOAD_SIZE: int = 64 * 1024
+    COMPRESSION_CACHE_BYTES: int = 32 * 1024 * 1024
+    COMPRESSION_CACHED_PATHS: list[str] = ["/products", "/category/all_categories", "/reviews"]
+
+    RELATED_TOP_K: int = 10
+    RELATED_CHUNK_SIZE: int = 1024
+    RELATED_INTERVAL: float = 6 * 3600
+
+    LEADERBOARD_SIZE: int = 20
+    LEADERBOARD_RESERVE: int = 200
+    LEADERBOARD_REFRESH_INTERVAL: float = 300
+
+    AUTOCOMPLETE_LIMIT: int = 10
+    AUTOCOMPLETE_CACHE_SIZE: int = 10000
+    AUTOCOMPLETE_REFRESH_INTERVAL: float = 600
+
+    EVENTS_BACKEND: str = "local"
+    EVENTS_CHANNEL: str = "catalog_events"
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_KEEPALIVE: float = 15
+    EVENTS_RETRY_MS: int = 3000
+
+    IDEMPOTENCY_PATHS: list[str] = ["/products/create", "/category/create", "/reviews/create"]
+    IDEMPOTENCY_TTL: float = 24 * 3600
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_LOCK_TIMEOUT: float = 60
+    IDEMPOTENCY_WAIT_TIMEOUT: float = 30
+    IDEMPOTENCY_POLL_INTERVAL: float = 0.2
+    IDEMPOTENCY_PURGE_BATCH: int = 1000
+    IDEMPOTENCY_PURGE_INTERVAL: float = 3600
+
+    CHANGES_DEFAULT_LIMIT: int = 500
+    CHANGES_MAX_LIMIT: int = 5000
+
+    MIGRATION_LOCK_TIMEOUT: str = "3s"
+    MIGRATION_STATEMENT_TIMEOUT: str = "60s"
+    MIGRATION_BACKFILL_BATCH: int = 5000
+    MIGRATION_BACKFILL_PAUSE: float = 0.05
+
     class Config:
         env_file = ".env"
 
@@ -1,10 +1,14 @@
+import time
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session, create_session
 from sqlalchemy import create_engine
 
 from app.backend.config import settings
+from app.backend.query_stats import recorder
 
-engine = create_async_engine(settings.PG_URL, echo=True)
+engine = create_async_engine(settings.PG_URL, echo=settings.SQL_ECHO)
 async_session_maker = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
 
 
@@ -14,3 +18,38 @@ async_session_maker = async_sessionmaker(bind=engine, expire_on_commit=False, cl
 
 class Base(DeclarativeBase):
     pass
+
+
+recorder.install(engine)
+
+
+pool_metrics = {"checked_out": 0, "peak_checked_out": 0, "checkouts": 0, "hold_seconds": 0.0}
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checked_out_at"] = time.perf_counter()
+    pool_metrics["checkouts"] += 1
+    pool_metrics["checked_out"] += 1
+    pool_metrics["peak_checked_out"] = max(pool_metrics["peak_checked_out"], pool_metrics["checked_out"])
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def on_checkin(dbapi_connection, connection_record):
+    started = connection_record.info.pop("checked_out_at", None)
+    if started is not None:
+        pool_metrics["checked_out"] -= 1
+        pool_metrics["hold_seconds"] += time.perf_counter() - started
+
+
+def pool_stats() -> dict:
+    pool = engine.pool
+    checkouts = pool_metrics["checkouts"]
+    return {
+        "size": pool.size(),
+        "checked_out": pool_metrics["checked_out"],
+        "peak_checked_out": pool_metrics["peak_checked_out"],
+        "overflow": pool.overflow(),
+        "checkouts": checkouts,
+        "avg_hold_ms": round(pool_metrics["hold_seconds"] / checkouts * 1000, 3) if checkouts else 0.0,
+    }
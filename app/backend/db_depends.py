@@ -2,6 +2,47 @@ from app.backend.db import async_session_maker
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-async def get_session() -> AsyncSession:
-    async with async_session_maker() as session:
-        yield session
+class UnitOfWork:
+    """Request-scoped database work that only opens a session when it is first used.
+
+    ``async with uow as session:`` commits when the block succeeds, rolls back when it raises,
+    and closes the session either way, so the pooled connection goes back to the pool as soon
+    as the handler's database work is done rather than after the response is serialized.
+    """
+
+    def __init__(self):
+        self._session: AsyncSession | None = None
+
+    @property
+    def session(self) -> AsyncSession:
+        # AsyncSession itself checks out a connection only when the first statement runs.
+        if self._session is None:
+            self._session = async_session_maker()
+        return self._session
+
+    async def __aenter__(self) -> AsyncSession:
+        return self.session
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close(commit=exc_type is None)
+
+    async def close(self, commit: bool = False):
+        if self._session is None:
+            return
+        session, self._session = self._session, None
+        try:
+            if commit:
+                await session.commit()
+            else:
+                await session.rollback()
+        finally:
+            await session.close()
+
+
+async def get_uow() -> UnitOfWork:
+    uow = UnitOfWork()
+    try:
+        yield uow
+    finally:
+        # Rolls back anything a handler opened outside ``async with uow``.
+        await uow.close()
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Awaitable, Callable
+
+from app.backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Queued in place of the events a slow subscriber missed; the client should refetch current state.
+LAGGED = {"event": "lagged", "data": {}}
+
+
+class Subscriber:
+    def __init__(self, size: int):
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=size)
+
+    def put(self, message: dict):
+        if self.queue.full():
+            # Never let one slow client hold an unbounded backlog: drop what it has not read yet.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(LAGGED)
+            return
+        self.queue.put_nowait(message)
+
+
+class Hub:
+    """In-process fan-out of change events to SSE subscribers, keyed by topic such as ``product:42``."""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.subscribers: dict[str, set[Subscriber]] = defaultdict(set)
+        self.listeners: dict[str, list[Callable[[dict], None]]] = defaultdict(list)
+
+    def listen(self, topic: str, callback: Callable[[dict], None]):
+        """Run the callback in this process for every message on the topic, e.g. to update in-memory state."""
+        self.listeners[topic].append(callback)
+
+    @contextmanager
+    def subscribe(self, topics: list[str]):
+        subscriber = Subscriber(self.queue_size)
+        for topic in topics:
+            self.subscribers[topic].add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            for topic in topics:
+                subscribers = self.subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self.subscribers[topic]
+
+    def deliver(self, topics: list[str], message: dict):
+        # A subscriber to several of the topics still gets the message once.
+        targets = set()
+        for topic in topics:
+            targets.update(self.subscribers.get(topic, ()))
+        for subscriber in targets:
+            subscriber.put(message)
+        for topic in topics:
+            for callback in self.listeners.get(topic, ()):
+                try:
+                    callback(message)
+                except Exception:
+                    logger.exception("Listener for %s failed", topic)
+
+    def lag_all(self):
+        for subscriber in set().union(*self.subscribers.values()):
+            subscriber.put(LAGGED)
+
+
+class LocalBackend:
+    """Delivers only to subscribers of this process; enough for a single worker."""
+
+    def __init__(self, hub: Hub):
+        self.hub = hub
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, topics: list[str], message: dict):
+        self.hub.deliver(topics, message)
+
+
+class PostgresBackend:
+    """Broadcasts through LISTEN/NOTIFY so subscribers on every worker see every change.
+
+    Each process keeps one dedicated asyncpg connection outside the SQLAlchemy pool. A process
+    receives its own notifications too, so publishing never delivers locally by itself.
+    """
+
+    def __init__(self, hub: Hub, channel: str):
+        self.hub = hub
+        self.channel = channel
+        self.connection = None
+        self.lock = asyncio.Lock()
+        self.reconnecting: asyncio.Task | None = None
+
+    async def start(self):
+        import asyncpg
+
+        self.connection = await asyncpg.connect(host=settings.PG_HOST, port=settings.PG_PORT,
+                                                user=settings.PG_USER, password=settings.PG_PASSWORD,
+                                                database=settings.PG_DB)
+        await self.connection.add_listener(self.channel, self.on_notify)
+        self.connection.add_termination_listener(self.on_terminated)
+
+    async def stop(self):
+        if self.reconnecting is not None:
+            self.reconnecting.cancel()
+        if self.connection is not None:
+            connection, self.connection = self.connection, None
+            await connection.close()
+
+    def on_notify(self, connection, pid, channel, payload):
+        try:
+            notification = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed notification on %s", channel)
+            return
+        self.hub.deliver(notification["topics"], notification["message"])
+
+    def on_terminated(self, connection):
+        if self.connection is connection:
+            self.connection = None
+            self.reconnecting = asyncio.get_running_loop().create_task(self.reconnect())
+
+    async def reconnect(self):
+        delay = 1.0
+        while True:
+            try:
+                await self.start()
+            except Exception:
+                logger.exception("Reconnecting event listener failed")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+            # Notifications sent while disconnected are lost; tell clients to refetch.
+            self.hub.lag_all()
+            return
+
+    async def publish(self, topics: list[str], message: dict):
+        if self.connection is None:
+            logger.warning("Event listener is disconnected, dropping event for %s", topics)
+            return
+        payload = json.dumps({"topics": topics, "message": message}, default=str)
+        async with self.lock:
+            await self.connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+
+hub = Hub(settings.EVENTS_QUEUE_SIZE)
+
+if settings.EVENTS_BACKEND == "postgres":
+    backend = PostgresBackend(hub, settings.EVENTS_CHANNEL)
+else:
+    backend = LocalBackend(hub)
+
+
+async def publish(topics: list[str], event: str, data: dict):
+    """Publish after the writing transaction has committed; failures are logged, never raised to the writer."""
+    try:
+        await backend.publish(topics, {"event": event, "data": data})
+    except Exception:
+        logger.exception("Publishing %s failed", event)
+
+
+def encode(message: dict) -> str:
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'], default=str)}\n\n"
+
+
+async def stream(topics: list[str], snapshot: Callable[[], Awaitable[list[dict]]] | None = None):
+    """Server-sent events for the topics, with a comment line every EVENTS_KEEPALIVE seconds of silence.
+
+    ``snapshot`` is loaded after subscribing, so no change can fall between it and the first event.
+    """
+    with hub.subscribe(topics) as subscriber:
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+        if snapshot is not None:
+            for message in await snapshot():
+                yield encode(message)
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), settings.EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield encode(message)
@@ -0,0 +1,274 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from starlette import status
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.backend.config import settings
+from app.backend.db import async_session_maker
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredResponse:
+    request_hash: str
+    status_code: int
+    content_type: str | None
+    body: bytes
+    expires_at: datetime
+
+
+class StillInProgress(Exception):
+    pass
+
+
+class ResponseCache:
+    """LRU of completed responses in front of the table, so hot replays skip the database."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, StoredResponse] = OrderedDict()
+
+    def get(self, key: str) -> StoredResponse | None:
+        stored = self.entries.get(key)
+        if stored is None:
+            return None
+        if stored.expires_at <= datetime.now():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return stored
+
+    def put(self, key: str, stored: StoredResponse):
+        self.entries[key] = stored
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+async def claim(key: str, request_hash: str) -> tuple[bool, IdempotencyKey | None]:
+    """Insert the key as in progress; returns (claimed, existing row when someone else holds it)."""
+    now = datetime.now()
+    values = dict(request_hash=request_hash, status_code=None, content_type=None, response_body=None,
+                  locked_at=now, expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL))
+    async with async_session_maker() as session:
+        claimed = await session.scalar(
+            insert(IdempotencyKey).values(key=key, **values)
+            .on_conflict_do_nothing(index_elements=[IdempotencyKey.key])
+            .returning(IdempotencyKey.id))
+        if claimed is None:
+            # Take over a claim whose owner died before finishing, or a row past its TTL.
+            stale = now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+            claimed = await session.scalar(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key,
+                       or_(and_(IdempotencyKey.status_code.is_(None), IdempotencyKey.locked_at < stale),
+                           IdempotencyKey.expires_at <= now))
+                .values(**values)
+                .returning(IdempotencyKey.id))
+        row = None
+        if claimed is None:
+            row = await session.scalar(select(IdempotencyKey).where(IdempotencyKey.key == key))
+        await session.commit()
+    return claimed is not None, row
+
+
+async def purge_expired() -> int:
+    total = 0
+    while True:
+        async with async_session_maker() as session:
+            expired = (select(IdempotencyKey.id)
+                       .where(IdempotencyKey.expires_at <= datetime.now())
+                       .limit(settings.IDEMPOTENCY_PURGE_BATCH)
+                       .scalar_subquery())
+            result = await session.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired)))
+            await session.commit()
+        total += result.rowcount
+        if result.rowcount < settings.IDEMPOTENCY_PURGE_BATCH:
+            return total
+
+
+class IdempotencyMiddleware:
+    """Replays the recorded response of a POST retried with the same ``Idempotency-Key`` header.
+
+    Keys are scoped by the Authorization header and path. The first request claims the key in
+    ``idempotency_keys``; duplicates arriving while it runs wait for it, in-process on a future and
+    across workers by polling the row. Responses below 500 are stored for IDEMPOTENCY_TTL seconds;
+    a 5xx or an exception releases the key so the client can retry. Reusing a key with a different
+    body is rejected with 422.
+
+    The stored response is written after the handler's own transaction commits, so a worker crash
+    in between leaves the claim to expire after IDEMPOTENCY_LOCK_TIMEOUT and the write can run again.
+    """
+
+    def __init__(self, app: ASGIApp, paths: list[str], cache_size: int):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.cache = ResponseCache(cache_size)
+        self.in_flight: dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get("idempotency-key")
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > 255:
+            await JSONResponse({"detail": "Idempotency-Key must be 1 to 255 characters"},
+                               status_code=status.HTTP_400_BAD_REQUEST)(scope, receive, send)
+            return
+
+        body = await read_body(receive)
+        request_hash = hashlib.sha256(body).hexdigest()
+        key = hashlib.sha256("\n".join((headers.get("authorization", ""), scope["path"],
+                                        idempotency_key)).encode()).hexdigest()
+
+        try:
+            stored = await self.acquire(key, request_hash)
+        except StillInProgress:
+            await JSONResponse({"detail": "A request with this Idempotency-Key is still in progress"},
+                               status_code=status.HTTP_409_CONFLICT, headers={"Retry-After": "1"})(scope, receive, send)
+            return
+
+        if stored is not None:
+            if stored.request_hash != request_hash:
+                await JSONResponse({"detail": "Idempotency-Key was already used with a different request"},
+                                   status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)(scope, receive, send)
+                return
+            await replay(stored, send)
+            return
+
+        await self.run(scope, body, receive, send, key, request_hash)
+
+    async def acquire(self, key: str, request_hash: str) -> StoredResponse | None:
+        """The stored response for the key, or None once this request owns it."""
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        while True:
+            stored = self.cache.get(key)
+            if stored is not None:
+                return stored
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise StillInProgress
+
+            pending = self.in_flight.get(key)
+            if pending is not None:
+                try:
+                    await asyncio.wait_for(asyncio.shield(pending), remaining)
+                except asyncio.TimeoutError:
+                    raise StillInProgress
+                continue
+
+            future = asyncio.get_running_loop().create_future()
+            self.in_flight[key] = future
+            try:
+                claimed, row = await claim(key, request_hash)
+            except BaseException:
+                self.release(key)
+                raise
+            if claimed:
+                return None
+            self.release(key)
+
+            if row is not None and row.status_code is not None:
+                stored = StoredResponse(row.request_hash, row.status_code, row.content_type,
+                                        row.response_body or b"", row.expires_at)
+                self.cache.put(key, stored)
+                return stored
+            # Held by another worker, or released between our insert and select.
+            await asyncio.sleep(min(settings.IDEMPOTENCY_POLL_INTERVAL, max(remaining, 0)))
+
+    def release(self, key: str):
+        future = self.in_flight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    async def run(self, scope: Scope, body: bytes, receive: Receive, send: Send, key: str, request_hash: str):
+        start: Message | None = None
+        chunks: list[bytes] = []
+        received = False
+
+        async def receive_body() -> Message:
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # The body was consumed up front; later receives only report the disconnect.
+            return await receive()
+
+        async def send_wrapper(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_wrapper)
+        except BaseException:
+            await self.forget(key)
+            raise
+
+        try:
+            if start is None or start["status"] >= 500:
+                await self.forget(key)
+            else:
+                await self.store(key, StoredResponse(
+                    request_hash, start["status"], Headers(raw=start["headers"]).get("content-type"),
+                    b"".join(chunks), datetime.now() + timedelta(seconds=settings.IDEMPOTENCY_TTL)))
+        finally:
+            self.release(key)
+
+    async def store(self, key: str, stored: StoredResponse):
+        async with async_session_maker() as session:
+            await session.execute(update(IdempotencyKey).where(IdempotencyKey.key == key)
+                                  .values(status_code=stored.status_code, content_type=stored.content_type,
+                                          response_body=stored.body, locked_at=None,
+                                          expires_at=stored.expires_at))
+            await session.commit()
+        self.cache.put(key, stored)
+
+    async def forget(self, key: str):
+        try:
+            async with async_session_maker() as session:
+                await session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+                await session.commit()
+        except Exception:
+            # The claim then expires after IDEMPOTENCY_LOCK_TIMEOUT.
+            logger.exception("Releasing idempotency key failed")
+        finally:
+            self.release(key)
+
+
+async def read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def replay(stored: StoredResponse, send: Send):
+    headers = [(b"content-length", str(len(stored.body)).encode()), (b"idempotent-replayed", b"true")]
+    if stored.content_type:
+        headers.append((b"content-type", stored.content_type.encode()))
+    await send({"type": "http.response.start", "status": stored.status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": stored.body})
@@ -0,0 +1,211 @@
+import heapq
+from bisect import bisect_left, insort
+from collections import defaultdict
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
+
+from app.backend import events
+from app.backend.config import settings
+from app.backend.db import async_session_maker
+from app.models.category import Category
+from app.models.products import Product
+from app.models.reviews import Review
+
+BOARDS = ("rating", "reviews")
+
+
+@dataclass
+class Entry:
+    category_id: int | None
+    rating: float
+    reviews: int
+    listed: bool
+
+
+class Leaderboards:
+    """Top products per category subtree, kept in memory and updated from the product and review writers.
+
+    Each category keeps the set of listed products in its subtree, and each board a ranked window of
+    its best size + reserve products, best first. Every product outside the window scores no higher than
+    the window's last entry, so a change is a bisect into the window and serving a board is O(K). The
+    window is rebuilt from the subtree only once more than ``reserve`` of its products have dropped out.
+    """
+
+    def __init__(self, size: int, reserve: int):
+        self.size = size
+        self.reserve = reserve
+        self.parents: dict[int, int | None] = {}
+        self.entries: dict[int, Entry] = {}
+        self.members: dict[int, set[int]] = defaultdict(set)
+        self.ranked: dict[tuple[int, str], list[tuple]] = {}
+        # Windows holding every member of their subtree, which may then be shorter than size.
+        self.complete: set[tuple[int, str]] = set()
+
+    def score(self, product_id: int, board: str) -> tuple:
+        entry = self.entries[product_id]
+        if board == "rating":
+            return entry.rating, entry.reviews, -product_id
+        return entry.reviews, entry.rating, -product_id
+
+    def key(self, product_id: int, board: str) -> tuple:
+        # Ascending order of keys is descending order of scores; the product id stays last.
+        first, second, _ = self.score(product_id, board)
+        return -first, -second, product_id
+
+    def ancestors(self, category_id: int | None) -> list[int]:
+        chain = []
+        while category_id is not None and category_id not in chain:
+            chain.append(category_id)
+            category_id = self.parents.get(category_id)
+        return chain
+
+    def load(self, parents: dict[int, int | None], entries: dict[int, Entry]):
+        self.parents = parents
+        self.entries = entries
+        self.members = defaultdict(set)
+        self.ranked = {}
+        self.complete = set()
+        for product_id, entry in entries.items():
+            if entry.listed:
+                for category_id in self.ancestors(entry.category_id):
+                    self.members[category_id].add(product_id)
+
+    def set_category(self, category_id: int, parent_id: int | None):
+        if category_id in self.parents and self.parents[category_id] == parent_id:
+            return
+        self.parents[category_id] = parent_id
+        self.load(self.parents, self.entries)
+
+    def _unlist(self, product_id: int):
+        entry = self.entries.get(product_id)
+        if entry is None or not entry.listed:
+            return
+        for category_id in self.ancestors(entry.category_id):
+            self.members[category_id].discard(product_id)
+            for board in BOARDS:
+                ranked = self.ranked.get((category_id, board))
+                if ranked is None:
+                    continue
+                key = self.key(product_id, board)
+                position = bisect_left(ranked, key)
+                if position < len(ranked) and ranked[position] == key:
+                    del ranked[position]
+
+    def _list(self, product_id: int):
+        entry = self.entries[product_id]
+        if not entry.listed:
+            return
+        for category_id in self.ancestors(entry.category_id):
+            self.members[category_id].add(product_id)
+            for board in BOARDS:
+                window = (category_id, board)
+                ranked = self.ranked.get(window)
+                if ranked is None:
+                    continue
+                key = self.key(product_id, board)
+                if window in self.complete or (ranked and key < ranked[-1]):
+                    insort(ranked, key)
+                    if len(ranked) > self.size + self.reserve:
+                        ranked.pop()
+                        self.complete.discard(window)
+                elif not ranked:
+                    # Everything ranked has dropped out; rebuild on the next read.
+                    del self.ranked[window]
+
+    def update_product(self, product_id: int, category_id: int | None, listed: bool, rating: float | None = None):
+        self._unlist(product_id)
+        previous = self.entries.get(product_id)
+        self.entries[product_id] = Entry(
+            category_id=category_id,
+            rating=rating if rating is not None else previous.rating if previous else 0.0,
+            reviews=previous.reviews if previous else 0,
+            listed=listed,
+        )
+        self._list(product_id)
+
+    def set_scores(self, product_id: int, rating: float, reviews: int):
+        entry = self.entries.get(product_id)
+        if entry is None:
+            return
+        self._unlist(product_id)
+        entry.rating, entry.reviews = rating, reviews
+        self._list(product_id)
+
+    def remove(self, product_id: int):
+        self._unlist(product_id)
+        self.entries.pop(product_id, None)
+
+    def get(self, category_id: int, board: str) -> list[int]:
+        window = (category_id, board)
+        ranked = self.ranked.get(window)
+        if ranked is None or (len(ranked) < self.size and window not in self.complete):
+            members = self.members.get(category_id, ())
+            ranked = sorted(heapq.nsmallest(self.size + self.reserve, (self.key(product_id, board)
+                                                                        for product_id in members)))
+            self.ranked[window] = ranked
+            if len(ranked) == len(members):
+                self.complete.add(window)
+            else:
+                self.complete.discard(window)
+        return [key[-1] for key in ranked[:self.size]]
+
+
+leaderboards = Leaderboards(settings.LEADERBOARD_SIZE, settings.LEADERBOARD_RESERVE)
+
+# Internal events topic carrying leaderboard writes to every worker; no client subscribes to it.
+TOPIC = "internal:leaderboards"
+WRITES = frozenset({"update_product", "set_scores", "remove", "set_category"})
+
+# Writes applied while refresh() reloads the boards; replayed onto the loaded state.
+_pending: list | None = None
+
+
+def apply(method: str, *args):
+    """Apply one write, e.g. ``("remove", product_id)``, to this worker's leaderboards."""
+    if method not in WRITES:
+        raise ValueError(f"Unknown leaderboard write {method!r}")
+    getattr(leaderboards, method)(*args)
+    if _pending is not None:
+        _pending.append((method, args))
+
+
+async def publish(method: str, *args):
+    """Send a write to every worker, this one included; call it after the transaction has committed."""
+    await events.publish([TOPIC], "leaderboard.write", {"method": method, "args": list(args)})
+
+
+def on_write(message: dict):
+    data = message["data"]
+    apply(data["method"], *data["args"])
+
+
+events.hub.listen(TOPIC, on_write)
+
+
+async def refresh():
+    global _pending
+    if _pending is not None:
+        return
+    # Recording starts before the rows are read, so a write either is in them or gets replayed.
+    _pending = []
+    try:
+        async with async_session_maker() as session:
+            categories = (await session.execute(select(Category.id, Category.parent_id))).all()
+            reviews = dict((await session.execute(
+                select(Review.product_id, func.count())
+                .where(Review.is_active)
+                .group_by(Review.product_id))).all())
+            products = (await session.execute(
+                select(Product.id, Product.category_id, Product.rating, Product.stock)
+                .where(Product.is_active))).all()
+
+        leaderboards.load(
+            {category_id: parent_id for category_id, parent_id in categories},
+            {product_id: Entry(category_id, rating or 0.0, reviews.get(product_id, 0), (stock or 0) > 0)
+             for product_id, category_id, rating, stock in products},
+        )
+        for method, args in _pending:
+            getattr(leaderboards, method)(*args)
+    finally:
+        _pending = None
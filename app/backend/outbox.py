@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.config import settings
+from app.backend.db import async_session_maker
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# A handler receives every event of its topic claimed in one batch, so work for
+# the same product is done once no matter how many writes queued it.
+Handler = Callable[[AsyncSession, list[OutboxEvent]], Awaitable[None]]
+
+handlers: dict[str, Handler] = {}
+
+
+def handler(topic: str):
+    def register(func: Handler) -> Handler:
+        handlers[topic] = func
+        return func
+
+    return register
+
+
+async def enqueue(session: AsyncSession, topic: str, product_id: int | None = None, payload: dict | None = None):
+    """Queue a side effect inside the caller's transaction; it runs only if that transaction commits."""
+    await session.execute(insert(OutboxEvent).values(topic=topic, product_id=product_id, payload=payload))
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]):
+    """Run the callback once the batch has committed, e.g. to publish what a handler changed."""
+    session.info.setdefault("after_commit", []).append(callback)
+
+
+def coalesce(events: list[OutboxEvent]) -> list[int]:
+    return sorted({event.product_id for event in events if event.product_id is not None})
+
+
+async def process_batch() -> int:
+    async with async_session_maker() as session:
+        query = (select(OutboxEvent)
+                 .where(OutboxEvent.processed_at.is_(None),
+                        OutboxEvent.failed_at.is_(None),
+                        OutboxEvent.available_at <= func.now())
+                 .order_by(OutboxEvent.id)
+                 .limit(settings.OUTBOX_BATCH_SIZE)
+                 .with_for_update(skip_locked=True))
+        events = (await session.scalars(query)).all()
+        if not events:
+            return 0
+
+        by_topic: dict[str, list[OutboxEvent]] = defaultdict(list)
+        for event in events:
+            by_topic[event.topic].append(event)
+
+        # Database time throughout: available_at defaults to now() there, and the app clock may differ.
+        now = func.now()
+        for topic, topic_events in by_topic.items():
+            attempts = {event.id: event.attempts or 0 for event in topic_events}
+            handle = handlers.get(topic)
+            callbacks = session.info.setdefault("after_commit", [])
+            queued = len(callbacks)
+            try:
+                if handle is None:
+                    raise LookupError(f"No outbox handler registered for {topic!r}")
+                async with session.begin_nested():
+                    await handle(session, topic_events)
+            except Exception as error:
+                logger.exception("Outbox handler for %s failed", topic)
+                del callbacks[queued:]
+                for event_id, tries in attempts.items():
+                    tries += 1
+                    values = {"attempts": tries, "last_error": repr(error)}
+                    if tries >= settings.OUTBOX_MAX_ATTEMPTS:
+                        values["failed_at"] = now
+                    else:
+                        values["available_at"] = now + timedelta(seconds=2 ** tries)
+                    await session.execute(update(OutboxEvent).where(OutboxEvent.id == event_id).values(**values))
+            else:
+                await session.execute(update(OutboxEvent).where(OutboxEvent.id.in_(list(attempts)))
+                                      .values(processed_at=now))
+
+        await session.commit()
+        callbacks = session.info.pop("after_commit", [])
+
+    for callback in callbacks:
+        try:
+            await callback()
+        except Exception:
+            logger.exception("Outbox after-commit callback failed")
+    return len(events)
+
+
+async def purge_finished() -> int:
+    """Delete processed and failed events older than OUTBOX_RETENTION, in batches."""
+    cutoff = func.now() - timedelta(seconds=settings.OUTBOX_RETENTION)
+    total = 0
+    while True:
+        async with async_session_maker() as session:
+            finished = (select(OutboxEvent.id)
+                        .where(or_(OutboxEvent.processed_at < cutoff, OutboxEvent.failed_at < cutoff))
+                        .limit(settings.OUTBOX_PURGE_BATCH)
+                        .scalar_subquery())
+            result = await session.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(finished)))
+            await session.commit()
+        total += result.rowcount
+        if result.rowcount < settings.OUTBOX_PURGE_BATCH:
+            return total
+
+
+async def run_worker():
+    while True:
+        try:
+            processed = await process_batch()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Outbox batch failed")
+            processed = 0
+        if processed < settings.OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL)
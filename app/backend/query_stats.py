@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# asyncpg binds render as "$1::INTEGER"; the cast goes first, or ":INTEGER" would read as a named parameter.
+_CAST = re.compile(r"::\w+(?:\s+(?:PRECISION|VARYING|WITH(?:OUT)?\s+TIME\s+ZONE))?(?:\(\d+(?:\s*,\s*\d+)?\))?(?:\[\])*",
+                   re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s|:\w+|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so queries differing only in literals or IN-list length share one entry."""
+    normalized = _CAST.sub("", statement)
+    normalized = _STRING.sub("?", normalized)
+    normalized = _PARAM.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (...)", normalized)
+    return _SPACE.sub(" ", normalized).strip()
+
+
+@dataclass
+class QueryStats:
+    fingerprint: str
+    count: int = 0
+    slow_count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    statement: str = ""
+    parameters: tuple | dict | None = None
+    plan: list | None = field(default=None, repr=False)
+
+    def as_dict(self) -> dict:
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "slow_count": self.slow_count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "plan": self.plan,
+        }
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.stats: dict[str, QueryStats] = {}
+        self.engine: AsyncEngine | None = None
+        self._explaining = False
+
+    def install(self, engine: AsyncEngine):
+        self.engine = engine
+        event.listen(engine.sync_engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self.after_cursor_execute)
+
+    # The start time lives on the execution context, so a statement that raises leaves nothing behind.
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context.query_started = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = context.query_started
+        if conn.info.get("explaining"):
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        slow = elapsed_ms >= settings.SLOW_QUERY_MS
+        if not slow and random.random() >= settings.QUERY_SAMPLE_RATE:
+            return
+        self.record(statement, None if executemany else parameters, elapsed_ms, slow)
+
+    def record(self, statement: str, parameters, elapsed_ms: float, slow: bool):
+        key = fingerprint(statement)
+        stats = self.stats.get(key)
+        if stats is None:
+            if len(self.stats) >= settings.QUERY_STATS_MAX:
+                cheapest = min(self.stats.values(), key=lambda item: item.total_ms)
+                del self.stats[cheapest.fingerprint]
+            stats = self.stats[key] = QueryStats(key)
+
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        if slow:
+            stats.slow_count += 1
+        if elapsed_ms >= stats.max_ms:
+            stats.max_ms = elapsed_ms
+            stats.statement, stats.parameters = statement, parameters
+
+        if slow and settings.SLOW_QUERY_EXPLAIN and stats.plan is None and not self._explaining \
+                and parameters is not None and key.upper().startswith("SELECT") and self.is_worst(stats):
+            self._explaining = True
+            try:
+                asyncio.get_running_loop().create_task(self.explain(stats))
+            except RuntimeError:
+                self._explaining = False
+
+    def is_worst(self, stats: QueryStats) -> bool:
+        worse = sum(1 for item in self.stats.values() if item.total_ms > stats.total_ms)
+        return worse < settings.SLOW_QUERY_EXPLAIN_TOP
+
+    async def explain(self, stats: QueryStats):
+        # ANALYZE executes the statement, so it runs in a transaction that is always rolled back.
+        try:
+            async with self.engine.connect() as connection:
+                connection.sync_connection.info["explaining"] = True
+                try:
+                    result = await connection.exec_driver_sql(
+                        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {stats.statement}", stats.parameters)
+                    stats.plan = result.scalar()
+                finally:
+                    connection.sync_connection.info.pop("explaining", None)
+                    await connection.rollback()
+        except Exception:
+            logger.exception("EXPLAIN failed for %s", stats.fingerprint)
+        finally:
+            self._explaining = False
+
+    def report(self, limit: int) -> list[dict]:
+        worst = sorted(self.stats.values(), key=lambda item: item.total_ms, reverse=True)
+        return [stats.as_dict() for stats in worst[:limit]]
+
+    def reset(self):
+        self.stats.clear()
+
+
+recorder = QueryRecorder()
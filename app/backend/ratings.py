@@ -0,0 +1,50 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import and_
+
+from app.backend import autocomplete, events, leaderboard, outbox
+from app.models.products import Product
+from app.models.rating import Rating
+from app.models.reviews import Review
+
+# Internal topic carrying recomputed scores to every worker; no client subscribes to it.
+SCORES_TOPIC = "internal:scores"
+# Keeps a NOTIFY payload well under Postgres' 8000 byte limit.
+SCORES_PER_EVENT = 100
+
+
+@outbox.handler("product.rating")
+async def recompute_rating(session: AsyncSession, events: list):
+    product_ids = outbox.coalesce(events)
+    grades = dict((await session.execute(
+        select(Rating.product_id, func.avg(Rating.grade))
+        .where(and_(Rating.product_id.in_(product_ids), Rating.is_active))
+        .group_by(Rating.product_id))).all())
+    counts = dict((await session.execute(
+        select(Review.product_id, func.count())
+        .where(and_(Review.product_id.in_(product_ids), Review.is_active))
+        .group_by(Review.product_id))).all())
+
+    scores = []
+    for product_id in product_ids:
+        rating = float(grades.get(product_id) or 0.0)
+        await session.execute(update(Product).where(Product.id == product_id).values(rating=rating))
+        scores.append([product_id, rating, counts.get(product_id, 0)])
+
+    # The in-memory leaderboards and autocomplete weights of every worker change only once the
+    # new ratings are committed. A worker that misses the broadcast catches up on its next refresh.
+    outbox.after_commit(session, lambda: publish_scores(scores))
+
+
+async def publish_scores(scores: list):
+    for start in range(0, len(scores), SCORES_PER_EVENT):
+        await events.publish([SCORES_TOPIC], "product.scores", {"scores": scores[start:start + SCORES_PER_EVENT]})
+
+
+def apply_scores(message: dict):
+    for product_id, rating, reviews in message["data"]["scores"]:
+        leaderboard.apply("set_scores", product_id, rating, reviews)
+        autocomplete.apply("products", "set_weight", product_id, rating)
+
+
+events.hub.listen(SCORES_TOPIC, apply_scores)
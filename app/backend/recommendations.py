@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.backend.config import settings
+from app.backend.db import async_session_maker, engine
+from app.models.rating import Rating
+from app.models.related import RelatedProduct
+
+logger = logging.getLogger(__name__)
+
+# pg advisory lock key held for the whole rebuild, so only one worker computes it per interval.
+REBUILD_LOCK = 0x72656c61746564
+
+
+def item_similarity(user_ids: np.ndarray, product_ids: np.ndarray, grades: np.ndarray,
+                    top_k: int, chunk_size: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Top-K cosine neighbours of every product, as flat (product, rank, related, score) arrays.
+
+    Similarities are computed for chunk_size products at a time and the blocks stay sparse,
+    so peak memory follows the number of co-rated pairs in a chunk rather than
+    chunk_size * n_products.
+    """
+    users, user_index = np.unique(user_ids, return_inverse=True)
+    products, product_index = np.unique(product_ids, return_inverse=True)
+    matrix = sparse.csc_matrix((grades.astype(np.float64), (user_index, product_index)),
+                               shape=(len(users), len(products)))
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1.0
+    matrix = (matrix @ sparse.diags(1.0 / norms)).tocsc()
+    transposed = matrix.T.tocsr()
+
+    sources, ranks, targets, scores = [], [], [], []
+    for start in range(0, len(products), chunk_size):
+        stop = min(start + chunk_size, len(products))
+        block = (transposed[start:stop] @ matrix).tocsr()
+
+        rows = np.repeat(np.arange(stop - start), np.diff(block.indptr))
+        keep = (block.indices != rows + start) & (block.data > 0)
+        rows, columns, values = rows[keep], block.indices[keep], block.data[keep]
+
+        # Sort each row's neighbours by descending score and keep the first top_k of every row.
+        order = np.lexsort((-values, rows))
+        rows, columns, values = rows[order], columns[order], values[order]
+        first = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else rows
+        rank = np.arange(len(rows)) - np.repeat(first, np.diff(np.r_[first, len(rows)]))
+        top = rank < top_k
+
+        sources.append(products[start + rows[top]])
+        ranks.append(rank[top])
+        targets.append(products[columns[top]])
+        scores.append(values[top])
+
+    return (np.concatenate(sources), np.concatenate(ranks),
+            np.concatenate(targets), np.concatenate(scores))
+
+
+RATINGS = (select(Rating.user_id, Rating.product_id, func.avg(Rating.grade))
+           .where(Rating.is_active, Rating.user_id.is_not(None), Rating.product_id.is_not(None))
+           .group_by(Rating.user_id, Rating.product_id))
+
+
+async def fetch_ratings() -> list:
+    # A private engine: the worker process must not touch connections inherited from the app's pool.
+    child_engine = create_async_engine(settings.PG_URL, poolclass=NullPool)
+    try:
+        async with child_engine.connect() as connection:
+            return (await connection.execute(RATINGS)).all()
+    finally:
+        await child_engine.dispose()
+
+
+def compute_related(top_k: int, chunk_size: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Runs in the worker process: loads the ratings and returns item_similarity's arrays.
+
+    Only the four result arrays cross back to the app, so no per-row Python work runs on its event loop.
+    """
+    rows = asyncio.run(fetch_ratings())
+    user_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    product_ids = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    grades = np.fromiter((float(row[2]) for row in rows), dtype=np.float64, count=len(rows))
+    del rows
+    if not len(grades):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, np.empty(0)
+    return item_similarity(user_ids, product_ids, grades, top_k, chunk_size)
+
+
+async def rebuild_related(force: bool = False) -> int | None:
+    """Rebuild the related_products table; returns None when skipped.
+
+    Every web worker runs this on its own schedule, so a rebuild is skipped while another worker holds
+    the advisory lock, or, unless forced, when the table was built less than RELATED_INTERVAL ago.
+    An empty table is always rebuilt; with no ratings that is cheap.
+    """
+    async with engine.connect() as connection:
+        locked = await connection.scalar(select(func.pg_try_advisory_lock(REBUILD_LOCK)))
+        await connection.commit()
+        if not locked:
+            logger.info("Related products rebuild is already running elsewhere, skipping")
+            return None
+        try:
+            if not force:
+                fresh = await connection.scalar(
+                    select(RelatedProduct.built_at > func.now() - timedelta(seconds=settings.RELATED_INTERVAL))
+                    .limit(1))
+                await connection.commit()
+                if fresh:
+                    return None
+            return await _rebuild()
+        finally:
+            await connection.execute(select(func.pg_advisory_unlock(REBUILD_LOCK)))
+            await connection.commit()
+
+
+async def _rebuild() -> int:
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        sources, ranks, targets, scores = await loop.run_in_executor(
+            pool, compute_related, settings.RELATED_TOP_K, settings.RELATED_CHUNK_SIZE)
+
+    # Readers keep seeing the previous table until this single transaction commits. The table
+    # lock still covers a rebuild started without the advisory lock, e.g. during a rolling deploy.
+    async with async_session_maker() as session:
+        await session.execute(text(f"LOCK TABLE {RelatedProduct.__tablename__} IN EXCLUSIVE MODE"))
+        await session.execute(delete(RelatedProduct))
+        if len(scores):
+            raw = await (await session.connection()).get_raw_connection()
+            # COPY straight from the arrays; built_at takes its default, the same now() for every row.
+            await raw.driver_connection.copy_records_to_table(
+                RelatedProduct.__tablename__,
+                records=zip(sources.tolist(), ranks.tolist(), targets.tolist(), scores.tolist()),
+                columns=["product_id", "rank", "related_id", "score"])
+        await session.commit()
+
+    logger.info("Rebuilt related products: %s pairs", len(scores))
+    return len(scores)
@@ -0,0 +1,61 @@
+import asyncio
+import os
+from pathlib import Path
+
+from app.backend.config import settings
+
+CONTENT_TYPES = {
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+}
+
+
+class LocalStorage:
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+
+    def path(self, key: str) -> Path | None:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root):
+            return None
+        return path
+
+    def _write(self, key: str, data: bytes):
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    async def save(self, key: str, data: bytes, content_type: str):
+        await asyncio.to_thread(self._write, key, data)
+
+    def url(self, key: str) -> str:
+        return f"/images/{key}"
+
+
+class S3Storage:
+    def __init__(self, bucket: str, endpoint_url: str | None, public_url: str):
+        import boto3
+
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/")
+
+    def path(self, key: str) -> Path | None:
+        return None
+
+    async def save(self, key: str, data: bytes, content_type: str):
+        await asyncio.to_thread(self.client.put_object, Bucket=self.bucket, Key=key, Body=data,
+                                ContentType=content_type, CacheControl="public, max-age=31536000, immutable")
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+
+if settings.IMAGE_STORAGE == "s3":
+    storage = S3Storage(settings.IMAGE_S3_BUCKET, settings.IMAGE_S3_ENDPOINT, settings.IMAGE_PUBLIC_URL)
+else:
+    storage = LocalStorage(settings.IMAGE_ROOT)
@@ -0,0 +1,16 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+async def periodic(interval: float, job: Callable[[], Awaitable]):
+    while True:
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Periodic job %s failed", job.__name__)
+        await asyncio.sleep(interval)
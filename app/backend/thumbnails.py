@@ -0,0 +1,45 @@
+import asyncio
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+from app.backend.config import settings
+
+pool: ProcessPoolExecutor | None = None
+
+
+def start_pool():
+    global pool
+    pool = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+
+
+def stop_pool():
+    global pool
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+        pool = None
+
+
+def make_thumbnails(data: bytes, sizes: list[int]) -> tuple[str, dict[int, bytes]]:
+    # Runs in a worker process: decoding and resampling hold the GIL for the whole image.
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image_format = image.format.lower()
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        thumbnails = {}
+        for size in sizes:
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, format="WEBP", quality=82, method=4)
+            thumbnails[size] = buffer.getvalue()
+
+    return image_format, thumbnails
+
+
+async def render_thumbnails(data: bytes) -> tuple[str, dict[int, bytes]]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, make_thumbnails, data, settings.THUMBNAIL_SIZES)
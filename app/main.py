@@ -1,13 +1,59 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
-from app.routers import category, products, auth, permission, reviews
+from app.backend import archive, autocomplete, events, idempotency, leaderboard, outbox, recommendations, thumbnails
+# Registers the outbox handlers before the worker starts.
+from app.backend import ratings  # noqa: F401
+from app.backend.compression import CompressionMiddleware
+from app.backend.idempotency import IdempotencyMiddleware
+from app.backend.config import settings
+from app.backend.tasks import periodic
+from app.routers import category, products, auth, permission, reviews, images, admin, search, changes
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    thumbnails.start_pool()
+    await events.backend.start()
+    tasks = [
+        asyncio.create_task(outbox.run_worker()),
+        asyncio.create_task(periodic(settings.ARCHIVE_INTERVAL, archive.run_archival)),
+        asyncio.create_task(periodic(settings.RELATED_INTERVAL, recommendations.rebuild_related)),
+        asyncio.create_task(periodic(settings.LEADERBOARD_REFRESH_INTERVAL, leaderboard.refresh)),
+        asyncio.create_task(periodic(settings.AUTOCOMPLETE_REFRESH_INTERVAL, autocomplete.refresh)),
+        asyncio.create_task(periodic(settings.IDEMPOTENCY_PURGE_INTERVAL, idempotency.purge_expired)),
+        asyncio.create_task(periodic(settings.OUTBOX_PURGE_INTERVAL, outbox.purge_finished)),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+    await events.backend.stop()
+    thumbnails.stop_pool()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(IdempotencyMiddleware,
+                   paths=settings.IDEMPOTENCY_PATHS,
+                   cache_size=settings.IDEMPOTENCY_CACHE_SIZE)
+app.add_middleware(CompressionMiddleware,
+                   minimum_size=settings.COMPRESSION_MIN_SIZE,
+                   offload_size=settings.COMPRESSION_OFFLOAD_SIZE,
+                   cached_paths=settings.COMPRESSION_CACHED_PATHS,
+                   cache_bytes=settings.COMPRESSION_CACHE_BYTES)
 
 app.include_router(category.router)
 app.include_router(products.router)
 app.include_router(auth.router)
 app.include_router(permission.router)
 app.include_router(reviews.router)
+app.include_router(images.router)
+app.include_router(admin.router)
+app.include_router(search.router)
+app.include_router(changes.router)
 
 
 @app.get("/")
@@ -12,6 +12,10 @@ from app.models.products import Product
 from app.models.user import User
 from app.models.rating import Rating
 from app.models.reviews import Review
+from app.models.outbox import OutboxEvent
+from app.models.archive import archives
+from app.models.related import RelatedProduct
+from app.models.idempotency import IdempotencyKey
 
 from alembic import context
 
@@ -65,7 +69,13 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    # Fail fast instead of queueing application queries behind a blocked ALTER.
+    connection.exec_driver_sql(f"SET lock_timeout = '{settings.MIGRATION_LOCK_TIMEOUT}'")
+    connection.exec_driver_sql(f"SET statement_timeout = '{settings.MIGRATION_STATEMENT_TIMEOUT}'")
+    connection.commit()
+
+    context.configure(connection=connection, target_metadata=target_metadata,
+                      transaction_per_migration=True)
 
     with context.begin_transaction():
         context.run_migrations()
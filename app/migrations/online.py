@@ -0,0 +1,111 @@
+"""Helpers for migrations that must not block traffic on large tables.
+
+env.py sets lock_timeout and statement_timeout on the migration connection, so any DDL that
+cannot get its lock quickly fails instead of queueing every query behind it. The helpers below
+cover the operations that need more than that: concurrent index builds outside a transaction,
+lock-timeout retries for short DDL, and throttled batched backfills.
+
+Every helper also renders with ``alembic upgrade --sql``. Offline there is no database to ask, so
+the validity check and the retries are skipped, and a backfill becomes a single UPDATE.
+"""
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy.exc import DBAPIError
+
+from app.backend.config import settings
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def _is_lock_timeout(error: DBAPIError) -> bool:
+    orig = error.orig
+    code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    return code == LOCK_NOT_AVAILABLE or "lock timeout" in str(orig)
+
+
+@contextmanager
+def no_timeouts():
+    # A concurrent build waits for every older transaction, and that wait counts against lock_timeout,
+    # so both are lifted. The lock it waits for, SHARE UPDATE EXCLUSIVE, does not block reads or writes.
+    op.execute("SET statement_timeout = 0")
+    op.execute("SET lock_timeout = 0")
+    try:
+        yield
+    finally:
+        op.execute(f"SET lock_timeout = '{settings.MIGRATION_LOCK_TIMEOUT}'")
+        op.execute(f"SET statement_timeout = '{settings.MIGRATION_STATEMENT_TIMEOUT}'")
+
+
+def with_lock_retries(operation: Callable[[], None], attempts: int = 5, delay: float = 1.0):
+    """Run short DDL in a savepoint, retrying with backoff when lock_timeout fires."""
+    if context.is_offline_mode():
+        operation()
+        return
+    bind = op.get_bind()
+    for attempt in range(1, attempts + 1):
+        try:
+            with bind.begin_nested():
+                operation()
+            return
+        except DBAPIError as error:
+            if attempt == attempts or not _is_lock_timeout(error):
+                raise
+            time.sleep(delay * 2 ** (attempt - 1))
+
+
+def add_nullable_column(table: str, column: sa.Column):
+    # A nullable column without a volatile default is a catalog-only change in Postgres,
+    # so the ACCESS EXCLUSIVE lock is held only for an instant.
+    if not column.nullable:
+        raise ValueError(f"{table}.{column.name} must be nullable; backfill it and add NOT NULL separately")
+    with_lock_retries(lambda: op.add_column(table, column))
+
+
+def _index_is_valid(name: str) -> bool | None:
+    return op.get_bind().execute(
+        sa.text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"),
+        {"name": name}).scalar()
+
+
+def create_index_concurrently(name: str, table: str, columns: list[str], **kw):
+    with op.get_context().autocommit_block(), no_timeouts():
+        valid = None if context.is_offline_mode() else _index_is_valid(name)
+        if valid:
+            return
+        if valid is False:
+            # Left behind by an interrupted concurrent build.
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        op.create_index(name, table, columns, postgresql_concurrently=True, **kw)
+
+
+def drop_index_concurrently(name: str, table: str):
+    with op.get_context().autocommit_block(), no_timeouts():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def backfill(table: str, set_clause: str, where: str = "TRUE",
+             batch_size: int | None = None, pause: float | None = None) -> int:
+    """UPDATE ``table`` in primary-key ranges, committing and sleeping between batches."""
+    batch_size = batch_size or settings.MIGRATION_BACKFILL_BATCH
+    pause = settings.MIGRATION_BACKFILL_PAUSE if pause is None else pause
+    if context.is_offline_mode():
+        op.execute(f"UPDATE {table} SET {set_clause} WHERE {where}")
+        return 0
+    total = 0
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        low, high = bind.execute(sa.text(f"SELECT min(id), max(id) FROM {table}")).one()
+        if low is None:
+            return 0
+        for start in range(low, high + 1, batch_size):
+            result = bind.execute(sa.text(
+                f"UPDATE {table} SET {set_clause} WHERE id >= :start AND id < :stop AND ({where})"),
+                {"start": start, "stop": start + batch_size})
+            total += result.rowcount
+            if pause:
+                time.sleep(pause)
+    return total
@@ -0,0 +1,30 @@
+"""Added archive change_seq indexes
+
+Revision ID: 33664ca91175
+Revises: eda8012f98d7
+Create Date: 2026-10-19 13:55:10.623057
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.online import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '33664ca91175'
+down_revision: Union[str, None] = 'eda8012f98d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index_concurrently(op.f('ix_categories_archive_change_seq'), 'categories_archive', ['change_seq'])
+    create_index_concurrently(op.f('ix_products_archive_change_seq'), 'products_archive', ['change_seq'])
+
+
+def downgrade() -> None:
+    drop_index_concurrently(op.f('ix_products_archive_change_seq'), 'products_archive')
+    drop_index_concurrently(op.f('ix_categories_archive_change_seq'), 'categories_archive')
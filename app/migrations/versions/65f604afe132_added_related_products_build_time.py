@@ -0,0 +1,30 @@
+"""Added related products build time
+
+Revision ID: 65f604afe132
+Revises: b1ac201c8331
+Create Date: 2026-10-19 14:12:11.671175
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.online import add_nullable_column, with_lock_retries
+
+
+# revision identifiers, used by Alembic.
+revision: str = '65f604afe132'
+down_revision: Union[str, None] = 'b1ac201c8331'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # now() is stable, so existing rows take one stored default and the table is not rewritten.
+    add_nullable_column('related_products', sa.Column('built_at', sa.DateTime(), nullable=True,
+                                                      server_default=sa.text('now()')))
+
+
+def downgrade() -> None:
+    with_lock_retries(lambda: op.drop_column('related_products', 'built_at'))
@@ -0,0 +1,32 @@
+"""Added foreign key indexes
+
+Revision ID: 94862afde806
+Revises: c1cf23711308
+Create Date: 2026-10-19 13:19:45.135909
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.online import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '94862afde806'
+down_revision: Union[str, None] = 'c1cf23711308'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index_concurrently(op.f('ix_products_category_id'), 'products', ['category_id'])
+    create_index_concurrently(op.f('ix_ratings_product_id'), 'ratings', ['product_id'])
+    create_index_concurrently(op.f('ix_reviews_product_id'), 'reviews', ['product_id'])
+
+
+def downgrade() -> None:
+    drop_index_concurrently(op.f('ix_reviews_product_id'), 'reviews')
+    drop_index_concurrently(op.f('ix_ratings_product_id'), 'ratings')
+    drop_index_concurrently(op.f('ix_products_category_id'), 'products')
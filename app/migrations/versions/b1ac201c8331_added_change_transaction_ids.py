@@ -0,0 +1,47 @@
+"""Added change transaction ids
+
+Revision ID: b1ac201c8331
+Revises: 33664ca91175
+Create Date: 2026-10-19 14:03:49.929811
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.online import (add_nullable_column, backfill, create_index_concurrently,
+                                   drop_index_concurrently, with_lock_retries)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1ac201c8331'
+down_revision: Union[str, None] = '33664ca91175'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRACKED = ['categories', 'products']
+
+
+def upgrade() -> None:
+    for table in TRACKED:
+        for target in (table, f'{table}_archive'):
+            add_nullable_column(target, sa.Column('change_txid', sa.BigInteger(), nullable=True))
+        with_lock_retries(lambda: op.alter_column(table, 'change_txid',
+                                                  server_default=sa.text("(pg_current_xact_id()::text)::bigint")))
+
+    for table in TRACKED:
+        # Rows written before this migration are final, so they all sort before any new write.
+        for target in (table, f'{table}_archive'):
+            backfill(target, "change_txid = 0", where="change_txid IS NULL")
+            create_index_concurrently(op.f(f'ix_{target}_change_cursor'), target, ['change_txid', 'change_seq'])
+        drop_index_concurrently(op.f(f'ix_{table}_archive_change_seq'), f'{table}_archive')
+
+
+def downgrade() -> None:
+    for table in reversed(TRACKED):
+        create_index_concurrently(op.f(f'ix_{table}_archive_change_seq'), f'{table}_archive', ['change_seq'])
+        for target in (table, f'{table}_archive'):
+            drop_index_concurrently(op.f(f'ix_{target}_change_cursor'), target)
+            with_lock_retries(lambda: op.drop_column(target, 'change_txid'))
@@ -0,0 +1,52 @@
+"""Added catalog change tracking
+
+Revision ID: eda8012f98d7
+Revises: e7c544058e4a
+Create Date: 2026-10-19 13:44:20.130603
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.online import (add_nullable_column, backfill, create_index_concurrently,
+                                   drop_index_concurrently, with_lock_retries)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'eda8012f98d7'
+down_revision: Union[str, None] = 'e7c544058e4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRACKED = ['categories', 'products']
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE IF NOT EXISTS catalog_change_seq")
+    for table in TRACKED:
+        add_nullable_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        add_nullable_column(table, sa.Column('change_seq', sa.BigInteger(), nullable=True))
+        # Defaults are set after the columns exist: adding a column with a volatile default rewrites the table.
+        with_lock_retries(lambda: op.alter_column(table, 'updated_at', server_default=sa.text('clock_timestamp()')))
+        with_lock_retries(lambda: op.alter_column(table, 'change_seq',
+                                                  server_default=sa.text("nextval('catalog_change_seq')")))
+        add_nullable_column(f'{table}_archive', sa.Column('updated_at', sa.DateTime(), nullable=True))
+        add_nullable_column(f'{table}_archive', sa.Column('change_seq', sa.BigInteger(), nullable=True))
+
+    for table in TRACKED:
+        backfill(table, "change_seq = nextval('catalog_change_seq'), updated_at = clock_timestamp()",
+                 where="change_seq IS NULL")
+        create_index_concurrently(op.f(f'ix_{table}_change_seq'), table, ['change_seq'])
+
+
+def downgrade() -> None:
+    for table in reversed(TRACKED):
+        drop_index_concurrently(op.f(f'ix_{table}_change_seq'), table)
+        with_lock_retries(lambda: op.drop_column(f'{table}_archive', 'change_seq'))
+        with_lock_retries(lambda: op.drop_column(f'{table}_archive', 'updated_at'))
+        with_lock_retries(lambda: op.drop_column(table, 'change_seq'))
+        with_lock_retries(lambda: op.drop_column(table, 'updated_at'))
+    op.execute("DROP SEQUENCE IF EXISTS catalog_change_seq")
@@ -0,0 +1,39 @@
+from sqlalchemy import Table, Column, DateTime, Index, func
+
+from app.backend.db import Base
+from app.models.category import Category
+from app.models.products import Product
+from app.models.rating import Rating
+from app.models.reviews import Review
+from app.models.user import User
+
+
+def archive_table(table: Table) -> Table:
+    # Same columns as the live table, but no foreign keys: archived rows are looked up by primary key
+    # when restored. The change cursor is indexed so the changes feed can find its archive horizon cheaply.
+    columns = [Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable,
+                      autoincrement=False)
+               for column in table.columns]
+    archive = Table(f"{table.name}_archive", Base.metadata, *columns,
+                    Column("archived_at", DateTime, server_default=func.now()))
+    if "change_txid" in archive.c:
+        Index(f"ix_{archive.name}_change_cursor", archive.c.change_txid, archive.c.change_seq)
+    return archive
+
+
+# Dependents first, so a row is never archived while a live row still references it.
+ARCHIVED = [Review, Rating, Product, Category, User]
+
+archives: dict[str, tuple[Table, Table]] = {
+    model.__tablename__: (model.__table__, archive_table(model.__table__)) for model in ARCHIVED
+}
+
+# Rows archived in the same transaction as the row they belong to, in this order: a deleted product
+# takes its reviews and ratings along, whatever their own state, so they never keep it in the live table.
+ARCHIVED_WITH: dict[str, list[Column]] = {
+    Product.__tablename__: [Review.__table__.c.product_id, Rating.__table__.c.product_id],
+}
+
+for model in ARCHIVED:
+    Index(f"ix_{model.__tablename__}_deleted_at", model.deleted_at,
+          postgresql_where=model.is_active.is_(False))
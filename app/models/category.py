@@ -1,6 +1,7 @@
-from sqlalchemy import Integer, Column, String, Boolean, ForeignKey
+from sqlalchemy import Integer, BigInteger, Column, String, Boolean, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from app.backend.db import Base
+from app.models.changes import catalog_change_seq, current_txid
 
 
 class Category(Base):
@@ -10,6 +11,14 @@ class Category(Base):
     name = Column(String)
     slug = Column(String, unique=True, index=True)
     is_active = Column(Boolean, default=True)
+    deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, server_default=func.clock_timestamp(), onupdate=func.clock_timestamp())
+    change_seq = Column(BigInteger, server_default=catalog_change_seq.next_value(),
+                        onupdate=catalog_change_seq.next_value(), index=True)
+    change_txid = Column(BigInteger, server_default=current_txid, onupdate=current_txid)
     parent_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
 
     products = relationship("Product", back_populates="category")
+
+
+Index("ix_categories_change_cursor", Category.change_txid, Category.change_seq)
@@ -0,0 +1,17 @@
+from sqlalchemy import BigInteger, Sequence, Text, cast, func
+
+from app.backend.db import Base
+
+# Shared by products and categories, so one cursor orders changes across both tables.
+catalog_change_seq = Sequence("catalog_change_seq", metadata=Base.metadata)
+
+
+def as_bigint(xid8):
+    # xid8 has no SQLAlchemy type; it is a 64-bit counter, so a bigint holds it and sorts the same.
+    return cast(cast(xid8, Text), BigInteger)
+
+
+# Id of the transaction writing the row. Rows whose id is below the oldest transaction still
+# running are final: no commit can add another change before them.
+current_txid = as_bigint(func.pg_current_xact_id())
+snapshot_xmin = as_bigint(func.pg_snapshot_xmin(func.pg_current_snapshot()))
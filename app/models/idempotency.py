@@ -0,0 +1,16 @@
+from app.backend.db import Base
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, func
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(64), unique=True, nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    content_type = Column(String, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    locked_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
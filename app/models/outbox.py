@@ -0,0 +1,22 @@
+from app.backend.db import Base
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, func
+
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    topic = Column(String, nullable=False)
+    product_id = Column(Integer, nullable=True)
+    payload = Column(JSON, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    available_at = Column(DateTime, server_default=func.now())
+    attempts = Column(Integer, default=0)
+    last_error = Column(String, nullable=True)
+    processed_at = Column(DateTime, nullable=True)
+    failed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_outbox_pending", "available_at",
+              postgresql_where=processed_at.is_(None) & failed_at.is_(None)),
+    )
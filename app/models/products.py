@@ -1,7 +1,9 @@
 from app.backend.db import Base
-from sqlalchemy import Column, ForeignKey, Integer, String, Boolean, Float
+from sqlalchemy import Column, ForeignKey, Integer, BigInteger, String, Boolean, Float, DateTime, Index, func
 from sqlalchemy.orm import relationship
 
+from app.models.changes import catalog_change_seq, current_txid
+
 
 class Product(Base):
     __tablename__ = "products"
@@ -15,7 +17,16 @@ class Product(Base):
     stock = Column(Integer)
     rating = Column(Float)
     is_active = Column(Boolean, default=True)
-    category_id = Column(Integer, ForeignKey("categories.id"))
+    deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, server_default=func.clock_timestamp(), onupdate=func.clock_timestamp())
+    change_seq = Column(BigInteger, server_default=catalog_change_seq.next_value(),
+                        onupdate=catalog_change_seq.next_value(), index=True)
+    change_txid = Column(BigInteger, server_default=current_txid, onupdate=current_txid)
+    category_id = Column(Integer, ForeignKey("categories.id"), index=True)
     supplier_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     category = relationship("Category", back_populates="products")
+    supplier = relationship("User")
+
+
+Index("ix_products_change_cursor", Product.change_txid, Product.change_seq)
@@ -1,5 +1,5 @@
 from app.backend.db import Base
-from sqlalchemy import Integer, String, Boolean, ForeignKey, Column, Date
+from sqlalchemy import Integer, String, Boolean, ForeignKey, Column, Date, DateTime
 import datetime
 
 
@@ -9,5 +9,6 @@ class Rating(Base):
     id = Column(Integer, primary_key=True, index=True)
     grade = Column(Integer)
     user_id = Column(Integer, ForeignKey("users.id"))
-    product_id = Column(Integer, ForeignKey("products.id"))
+    product_id = Column(Integer, ForeignKey("products.id"), index=True)
     is_active = Column(Boolean, default=True)
+    deleted_at = Column(DateTime, nullable=True)
@@ -0,0 +1,13 @@
+from app.backend.db import Base
+from sqlalchemy import Column, DateTime, Integer, Float, func
+
+
+class RelatedProduct(Base):
+    __tablename__ = "related_products"
+
+    product_id = Column(Integer, primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    related_id = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)
+    # Set once per rebuild; every row carries the same value.
+    built_at = Column(DateTime, server_default=func.now())
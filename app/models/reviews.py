@@ -1,5 +1,5 @@
 from app.backend.db import Base
-from sqlalchemy import Integer, String, Boolean, ForeignKey, Column, Date
+from sqlalchemy import Integer, String, Boolean, ForeignKey, Column, Date, DateTime
 import datetime
 
 
@@ -8,8 +8,9 @@ class Review(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    product_id = Column(Integer, ForeignKey("products.id"))
+    product_id = Column(Integer, ForeignKey("products.id"), index=True)
     rating_id = Column(Integer, ForeignKey("ratings.id"))
     comment = Column(String, nullable=False)
     comment_date = Column(Date, default=datetime.datetime.now())
     is_active = Column(Boolean, default=True)
+    deleted_at = Column(DateTime, nullable=True)
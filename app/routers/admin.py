@@ -0,0 +1,118 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Annotated
+from sqlalchemy.exc import IntegrityError
+from starlette import status
+
+from app.backend import archive, autocomplete, recommendations
+from app.backend.db import pool_stats
+from app.backend.query_stats import recorder
+from app.models.archive import archives
+from app.routers.auth import get_current_user
+from app.schemas import RestoreArchived
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.post("/archive/run")
+async def run_archival(get_user: Annotated[dict, Depends(get_current_user)]):
+    if get_user.get("is_admin"):
+        return {
+            'status_code': status.HTTP_200_OK,
+            'archived': await archive.run_archival()
+        }
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="You don't have admin permission"
+        )
+
+
+@router.post("/archive/restore")
+async def restore_archived(restore: RestoreArchived, get_user: Annotated[dict, Depends(get_current_user)]):
+    if get_user.get("is_admin"):
+        if restore.table not in archives:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There is no such archive")
+        try:
+            restored = await archive.restore(restore.table, restore.ids)
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Restore the rows these rows reference first"
+            )
+        return {
+            'status_code': status.HTTP_200_OK,
+            'restored': restored
+        }
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="You don't have admin permission"
+        )
+
+
+@router.post("/related/rebuild")
+async def rebuild_related(get_user: Annotated[dict, Depends(get_current_user)]):
+    if get_user.get("is_admin"):
+        pairs = await recommendations.rebuild_related(force=True)
+        if pairs is None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A rebuild is already running")
+        return {
+            'status_code': status.HTTP_200_OK,
+            'pairs': pairs
+        }
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="You don't have admin permission"
+        )
+
+
+@router.get("/pool")
+async def connection_pool(get_user: Annotated[dict, Depends(get_current_user)]):
+    if get_user.get("is_admin"):
+        return pool_stats()
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="You don't have admin permission"
+        )
+
+
+@router.get("/slow_queries")
+async def slow_queries(get_user: Annotated[dict, Depends(get_current_user)], limit: int = 20):
+    if get_user.get("is_admin"):
+        return recorder.report(limit)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="You don't have admin permission"
+        )
+
+
+@router.delete("/slow_queries")
+async def reset_slow_queries(get_user: Annotated[dict, Depends(get_current_user)]):
+    if get_user.get("is_admin"):
+        recorder.reset()
+        return {
+            'status_code': status.HTTP_200_OK,
+            'detail': 'Query statistics are reset'
+        }
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="You don't have admin permission"
+        )
+
+
+@router.get("/autocomplete")
+async def autocomplete_stats(get_user: Annotated[dict, Depends(get_current_user)]):
+    if get_user.get("is_admin"):
+        return {
+            'products': autocomplete.products.stats(),
+            'categories': autocomplete.categories.stats()
+        }
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="You don't have admin permission"
+        )
@@ -4,7 +4,7 @@ from starlette import status
 from passlib.context import CryptContext
 from typing import Annotated
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.backend.db_depends import get_session
+from app.backend.db_depends import UnitOfWork, get_uow
 from app.schemas import CreateUser
 from sqlalchemy import insert, select
 from app.models.user import User
@@ -30,7 +30,7 @@ async def create_access_token(username: str, user_id: int, is_admin: bool, is_su
     return jwt.encode(encode, settings.JWT_KEY, settings.JWT_ALGORITHM)
 
 
-async def authenticate(session: Annotated[AsyncSession, Depends(get_session)],
+async def authenticate(session: AsyncSession,
                        username: str, password: str):
     user = await session.scalar(select(User).where(User.username == username))
     if not user or not bcrypt_context.verify(password, user.hashed_password):
@@ -82,15 +82,15 @@ async def get_current_user(token: Annotated[str, Depends(qauth2_schema)]):
 
 
 @router.post("/")
-async def create_user(session: Annotated[AsyncSession, Depends(get_session)], user: CreateUser):
-    await session.execute(insert(User).values(
-        first_name=user.first_name,
-        last_name=user.last_name,
-        username=user.username,
-        email=user.email,
-        hashed_password=bcrypt_context.hash(user.password)
-    ))
-    await session.commit()
+async def create_user(uow: Annotated[UnitOfWork, Depends(get_uow)], user: CreateUser):
+    async with uow as session:
+        await session.execute(insert(User).values(
+            first_name=user.first_name,
+            last_name=user.last_name,
+            username=user.username,
+            email=user.email,
+            hashed_password=bcrypt_context.hash(user.password)
+        ))
     return {
         'status_code': status.HTTP_201_CREATED,
         'transaction': 'Successful'
@@ -98,9 +98,10 @@ async def create_user(session: Annotated[AsyncSession, Depends(get_session)], us
 
 
 @router.post("/token")
-async def login(session: Annotated[AsyncSession, Depends(get_session)],
+async def login(uow: Annotated[UnitOfWork, Depends(get_uow)],
                 form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
-    user: User = await authenticate(session, form_data.username, form_data.password)
+    async with uow as session:
+        user: User = await authenticate(session, form_data.username, form_data.password)
 
     if not user or user.is_active == False:
         raise HTTPException(
@@ -1,12 +1,16 @@
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import Annotated
-from app.backend.db_depends import get_session
-from sqlalchemy.ext.asyncio import AsyncSession
+from app.backend.db_depends import UnitOfWork, get_uow
 from app.schemas import CreateCategory
 from sqlalchemy import insert, select, update
 from app.models.category import Category
 from slugify import slugify
 from starlette import status
+from app.backend import autocomplete, events, leaderboard
+from app.backend.leaderboard import leaderboards, BOARDS
+from app.models.products import Product
 from app.routers.auth import get_current_user
 
 router = APIRouter(prefix="/category",
@@ -14,22 +18,59 @@ router = APIRouter(prefix="/category",
 
 
 @router.get("/all_categories")
-async def get_all_categories(session: Annotated[AsyncSession, Depends(get_session)]):
-    query = select(Category).where(Category.is_active)
-    categories = await session.execute(query)
-    return categories.scalars().all()
+async def get_all_categories(uow: Annotated[UnitOfWork, Depends(get_uow)]):
+    async with uow as session:
+        query = select(Category).where(Category.is_active)
+        categories = await session.execute(query)
+        return categories.scalars().all()
+
+
+@router.get("/{category_slug}/leaderboard")
+async def category_leaderboard(uow: Annotated[UnitOfWork, Depends(get_uow)],
+                               category_slug: str, board: str = "rating"):
+    if board not in BOARDS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Board must be one of {', '.join(BOARDS)}")
+
+    async with uow as session:
+        category = await session.scalar(select(Category).where(Category.slug == category_slug, Category.is_active))
+        if category is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There is no category found")
+
+        ids = leaderboards.get(category.id, board)
+        if not ids:
+            return []
+        products = {product.id: product
+                    for product in await session.scalars(
+                        # The boards can lag a write made on another worker by a moment; never serve what is unlisted.
+                        select(Product).where(Product.id.in_(ids), Product.is_active, Product.stock > 0))}
+    return [products[product_id] for product_id in ids if product_id in products]
+
+
+@router.get("/{category_slug}/events")
+async def category_events(uow: Annotated[UnitOfWork, Depends(get_uow)], category_slug: str):
+    async with uow as session:
+        category = await session.scalar(select(Category).where(Category.slug == category_slug, Category.is_active))
+    if category is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There is no category found")
+
+    # Events of products filed directly under this category; subcategories have their own streams.
+    return StreamingResponse(events.stream([f"category:{category.id}"]),
+                             media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @router.post("/create")
-async def create_category(session: Annotated[AsyncSession, Depends(get_session)],
+async def create_category(uow: Annotated[UnitOfWork, Depends(get_uow)],
                           category: CreateCategory,
                           get_user: Annotated[dict, Depends(get_current_user)]):
     if get_user.get("is_admin"):
-        query = insert(Category).values(name=category.name,
-                                        parent_id=category.parent_id,
-                                        slug=slugify(category.name))
-        await session.execute(query)
-        await session.commit()
+        async with uow as session:
+            query = insert(Category).values(name=category.name,
+                                            parent_id=category.parent_id,
+                                            slug=slugify(category.name)).returning(Category.id)
+            category_id = await session.scalar(query)
+        await leaderboard.publish("set_category", category_id, category.parent_id)
+        await autocomplete.publish("categories", "upsert", category_id, category.name, slugify(category.name))
 
         return {
             'status_code': status.HTTP_201_CREATED,
@@ -43,23 +84,26 @@ async def create_category(session: Annotated[AsyncSession, Depends(get_session)]
 
 
 @router.put("/update_category")
-async def update_category(session: Annotated[AsyncSession, Depends(get_session)],
+async def update_category(uow: Annotated[UnitOfWork, Depends(get_uow)],
                           category_id: int,
                           new_category: CreateCategory,
                           get_user: Annotated[dict, Depends(get_current_user)]):
     if get_user.get("is_admin"):
-        query = select(Category).where(Category.id == category_id)
-        request = await session.execute(query)
-        category = request.scalar()
-        if category is None:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There is no category found")
+        async with uow as session:
+            query = select(Category).where(Category.id == category_id)
+            request = await session.execute(query)
+            category = request.scalar()
+            if category is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There is no category found")
 
-        query = update(Category).where(Category.id == category_id).values(name=new_category.name,
-                                                                          slug=slugify(new_category.name),
-                                                                          parent_id=new_category.parent_id)
+            query = update(Category).where(Category.id == category_id).values(name=new_category.name,
+                                                                              slug=slugify(new_category.name),
+                                                                              parent_id=new_category.parent_id)
 
-        await session.execute(query)
-        await session.commit()
+            await session.execute(query)
+        await leaderboard.publish("set_category", category_id, new_category.parent_id)
+        if category.is_active:
+            await autocomplete.publish("categories", "upsert", category_id, new_category.name, slugify(new_category.name))
 
         return {
             'status_code': status.HTTP_200_OK,
@@ -73,17 +117,19 @@ async def update_category(session: Annotated[AsyncSession, Depends(get_session)]
 
 
 @router.delete("/delete")
-async def delete_category(session: Annotated[AsyncSession, Depends(get_session)],
+async def delete_category(uow: Annotated[UnitOfWork, Depends(get_uow)],
                           category_id: int,
                           get_user: Annotated[dict, Depends(get_current_user)]):
     if get_user.get("is_admin"):
-        query = await session.execute(select(Category).where(Category.id == category_id))
-        category = query.scalar()
-        if category is None:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There is no category found")
-        query = update(Category).where(Category.id == category_id).values(is_active=False)
-        await session.execute(query)
-        await session.commit()
+        async with uow as session:
+            query = await session.execute(select(Category).where(Category.id == category_id))
+            category = query.scalar()
+            if category is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There is no category found")
+            query = update(Category).where(Category.id == category_id).values(is_active=False,
+                                                                              deleted_at=datetime.now())
+            await session.execute(query)
+        await autocomplete.publish("categories", "remove", category_id)
         return {
             'status_code': status.HTTP_200_OK,
             'transaction': 'Category delete is successful'
@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Annotated
+from sqlalchemy import select, tuple_
+
+from app.backend.config import settings
+from app.backend.db_depends import UnitOfWork, get_uow
+from app.models.archive import archives
+from app.models.category import Category
+from app.models.changes import snapshot_xmin
+from app.models.products import Product
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+TRACKED = (("category", Category), ("product", Product))
+
+
+def change(kind: str, row) -> dict:
+    item = {'type': kind, 'id': row.id, 'seq': row.change_seq, 'updated_at': row.updated_at,
+            'deleted': not row.is_active}
+    if row.is_active:
+        item['data'] = {column.name: getattr(row, column.name) for column in row.__table__.columns}
+    return item
+
+
+def cursor(txid: int, seq: int) -> str:
+    return f"{txid}.{seq}"
+
+
+@router.get("/")
+async def catalog_changes(uow: Annotated[UnitOfWork, Depends(get_uow)],
+                          since: Annotated[str, Query(pattern=r"^(0|\d+\.\d+)$")] = "0",
+                          limit: Annotated[int, Query(ge=1, le=settings.CHANGES_MAX_LIMIT)] = settings.CHANGES_DEFAULT_LIMIT):
+    """Products and categories changed after the ``since`` cursor, oldest first; deleted rows come back as tombstones.
+
+    Rows are ordered by the id of the transaction that last wrote them, then by change_seq. A page only
+    includes rows written by transactions older than every transaction still running, so no commit can
+    later add a change before ``next``, however long the transaction took. Pass ``next`` back as ``since``.
+
+    Archival removes tombstones from the live tables. A cursor older than the newest archived change
+    gets 410 Gone, and the client resyncs from ``since=0``.
+    """
+    position = tuple(int(part) for part in since.split(".")) if since != "0" else (0, 0)
+    rows = []
+    async with uow as session:
+        # Taken before the rows are read: every transaction below it has already finished.
+        xmin = await session.scalar(select(snapshot_xmin))
+        for kind, model in TRACKED:
+            result = await session.scalars(
+                select(model)
+                .where(tuple_(model.change_txid, model.change_seq) > tuple_(*position),
+                       model.change_txid < xmin)
+                .order_by(model.change_txid, model.change_seq)
+                .limit(limit + 1))
+            rows.extend((kind, row) for row in result.all())
+        # Read after the rows, so a batch archived in between is reported rather than silently missed.
+        horizon = (0, 0)
+        for _, model in TRACKED:
+            archive = archives[model.__tablename__][1]
+            newest = (await session.execute(
+                select(archive.c.change_txid, archive.c.change_seq)
+                .where(archive.c.change_txid.is_not(None), archive.c.change_seq.is_not(None))
+                .order_by(archive.c.change_txid.desc(), archive.c.change_seq.desc())
+                .limit(1))).first()
+            if newest is not None:
+                horizon = max(horizon, tuple(newest))
+    if since != "0" and position < horizon:
+        raise HTTPException(status_code=status.HTTP_410_GONE,
+                            detail="Changes before this cursor were archived, resync from since=0")
+    rows.sort(key=lambda item: (item[1].change_txid, item[1].change_seq))
+
+    page = rows[:limit]
+    return {
+        'changes': [change(kind, row) for kind, row in page],
+        'next': cursor(page[-1][1].change_txid, page[-1][1].change_seq) if page else since,
+        'has_more': len(rows) > limit
+    }
@@ -0,0 +1,59 @@
+import os
+import stat
+
+from fastapi import APIRouter, HTTPException
+from starlette import status
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+
+from app.backend.storage import storage
+
+router = APIRouter(prefix="/images", tags=["images"])
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison, as RFC 9110 requires for If-None-Match.
+    if if_none_match.strip() == "*":
+        return True
+    tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == tag for candidate in if_none_match.split(","))
+
+
+class ImageResponse(FileResponse):
+    # Starlette's FileResponse ignores If-None-Match, so a matching ETag is answered with 304 here.
+    # Servers implementing the ASGI pathsend extension stream the file with sendfile;
+    # everything else (ranges, HEAD) goes through FileResponse.
+    async def __call__(self, scope, receive, send):
+        headers = Headers(scope=scope)
+        etag = self.headers.get("etag")
+        if_none_match = headers.get("if-none-match")
+        if etag and if_none_match and etag_matches(if_none_match, etag):
+            not_modified = [(name, value) for name, value in self.raw_headers
+                            if name in (b"etag", b"cache-control", b"last-modified")]
+            await send({"type": "http.response.start", "status": status.HTTP_304_NOT_MODIFIED,
+                        "headers": not_modified})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if ("http.response.pathsend" in scope.get("extensions", {}) and scope["method"] == "GET"
+                and "range" not in headers):
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            return
+        await super().__call__(scope, receive, send)
+
+
+@router.get("/{key:path}")
+async def get_image(key: str):
+    path = storage.path(key)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    try:
+        stat_result = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+
+    return ImageResponse(path, stat_result=stat_result, headers={"Cache-Control": CACHE_CONTROL})
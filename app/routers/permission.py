@@ -3,8 +3,7 @@ from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from starlette import status
 from passlib.context import CryptContext
 from typing import Annotated
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.backend.db_depends import get_session
+from app.backend.db_depends import UnitOfWork, get_uow
 from app.schemas import CreateUser
 from sqlalchemy import insert, select
 from app.models.user import User
@@ -21,30 +20,31 @@ router = APIRouter(
 
 
 @router.patch("/")
-async def supplier_permission(session: Annotated[AsyncSession, Depends(get_session)],
+async def supplier_permission(uow: Annotated[UnitOfWork, Depends(get_uow)],
                               get_user: Annotated[dict, Depends(get_current_user)],
                               user_id: int):
     if get_user.get("is_admin"):
-        user: User = await session.scalar(select(User).where(User.id == user_id))
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail='User not found'
-            )
-        if user.is_supplier:
-            await session.execute(update(User).where(User.id == user_id).values(is_supplier=False, is_customer=True))
-            await session.commit()
-            return {
-                'status_code': status.HTTP_200_OK,
-                'detail': 'User is no longer supplier'
-            }
-        else:
-            await session.execute(update(User).where(User.id == user_id).values(is_supplier=True, is_customer=False))
-            await session.commit()
-            return {
-                'status_code': status.HTTP_200_OK,
-                'detail': 'User is now supplier'
-            }
+        async with uow as session:
+            user: User = await session.scalar(select(User).where(User.id == user_id))
+            if not user:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail='User not found'
+                )
+            if user.is_supplier:
+                await session.execute(update(User).where(User.id == user_id).values(is_supplier=False,
+                                                                                       is_customer=True))
+                return {
+                    'status_code': status.HTTP_200_OK,
+                    'detail': 'User is no longer supplier'
+                }
+            else:
+                await session.execute(update(User).where(User.id == user_id).values(is_supplier=True,
+                                                                                       is_customer=False))
+                return {
+                    'status_code': status.HTTP_200_OK,
+                    'detail': 'User is now supplier'
+                }
 
     else:
         raise HTTPException(
@@ -54,36 +54,37 @@ async def supplier_permission(session: Annotated[AsyncSession, Depends(get_sessi
 
 
 @router.delete("/delete")
-async def delete_user(session: Annotated[AsyncSession, Depends(get_session)],
+async def delete_user(uow: Annotated[UnitOfWork, Depends(get_uow)],
                       get_user: Annotated[dict, Depends(get_current_user)],
                       user_id: int):
     if get_user.get("is_admin"):
-        user: User = await session.scalar(select(User).where(User.id == user_id))
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail='User not found'
-            )
-        if user.is_admin:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="You can't delete admin user"
-            )
+        async with uow as session:
+            user: User = await session.scalar(select(User).where(User.id == user_id))
+            if not user:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail='User not found'
+                )
+            if user.is_admin:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="You can't delete admin user"
+                )
 
-        if user.is_active:
-            await session.execute(update(User).where(User.id == user_id).values(is_active=True))
-            await session.commit()
-            return {
-                'status_code': status.HTTP_200_OK,
-                'detail': 'User is deleted'
-            }
-        else:
-            await session.execute(update(User).where(User.id == user_id).values(is_active=False))
-            await session.commit()
-            return {
-                'status_code': status.HTTP_200_OK,
-                'detail': 'User is activated'
-            }
+            if user.is_active:
+                await session.execute(update(User).where(User.id == user_id).values(is_active=False,
+                                                                                       deleted_at=datetime.now()))
+                return {
+                    'status_code': status.HTTP_200_OK,
+                    'detail': 'User is deleted'
+                }
+            else:
+                await session.execute(update(User).where(User.id == user_id).values(is_active=True,
+                                                                                       deleted_at=None))
+                return {
+                    'status_code': status.HTTP_200_OK,
+                    'detail': 'User is activated'
+                }
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
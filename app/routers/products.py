@@ -1,46 +1,105 @@
-from fastapi import APIRouter, Depends, HTTPException
+import hashlib
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 from typing import Annotated
-from app.backend.db_depends import get_session
-from sqlalchemy.ext.asyncio import AsyncSession
+from PIL import Image, UnidentifiedImageError
+from app.backend.db_depends import UnitOfWork, get_uow
 from sqlalchemy import insert, select, update
+from sqlalchemy.orm import selectinload
 from slugify import slugify
 from starlette import status
 from sqlalchemy.sql import and_
 
+from app.backend import autocomplete, events, leaderboard
+from app.backend.config import settings
+from app.backend.db import async_session_maker
+from app.backend.thumbnails import render_thumbnails
+from app.backend.storage import storage, CONTENT_TYPES
 from app.routers.auth import get_current_user
 from app.schemas import CreateProduct
 from app.models.products import Product
 from app.models.category import Category
+from app.models.related import RelatedProduct
 
 router = APIRouter(prefix='/products', tags=['products'])
 
+INCLUDES = {
+    'category': (Product.category, ('id', 'name', 'slug', 'parent_id')),
+    'supplier': (Product.supplier, ('id', 'username', 'first_name', 'last_name')),
+}
+
+
+def parse_include(include: str | None) -> list[str]:
+    names = [name.strip() for name in include.split(',') if name.strip()] if include else []
+    unknown = sorted(set(names) - INCLUDES.keys())
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown include: {', '.join(unknown)}")
+    return names
+
+
+def with_includes(query, names: list[str]):
+    # selectinload issues one extra IN query per relationship for the whole page, never one per product
+    return query.options(*[selectinload(INCLUDES[name][0]) for name in names])
+
+
+def expand(product: Product, names: list[str]):
+    if not names:
+        return product
+    data = {column.name: getattr(product, column.name) for column in Product.__table__.columns}
+    for name in names:
+        related = getattr(product, name)
+        fields = INCLUDES[name][1]
+        data[name] = None if related is None else {field: getattr(related, field) for field in fields}
+    return data
+
+
+def product_state(product: Product) -> dict:
+    return {field: getattr(product, field)
+            for field in ('id', 'slug', 'name', 'price', 'stock', 'category_id', 'is_active')}
+
+
+def product_topics(product_id: int, *category_ids: int | None) -> list[str]:
+    return [f"product:{product_id}"] + [f"category:{category_id}"
+                                        for category_id in dict.fromkeys(category_ids) if category_id is not None]
+
 
 @router.get('/')
-async def all_products(session: Annotated[AsyncSession, Depends(get_session)]):
-    query = await session.execute(select(Product).where(and_(Product.is_active, Product.stock > 0)))
-    products = query.scalars().all()
+async def all_products(uow: Annotated[UnitOfWork, Depends(get_uow)], include: str | None = None):
+    names = parse_include(include)
+    async with uow as session:
+        query = await session.execute(
+            with_includes(select(Product).where(and_(Product.is_active, Product.stock > 0)), names))
+        products = query.scalars().all()
     if products is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There are no products")
 
-    return products
+    return [expand(product, names) for product in products]
 
 
 @router.post('/create')
-async def create_product(session: Annotated[AsyncSession, Depends(get_session)], product: CreateProduct,
+async def create_product(uow: Annotated[UnitOfWork, Depends(get_uow)], product: CreateProduct,
                          get_user: Annotated[dict, Depends(get_current_user)]):
     if get_user.get("is_admin") or get_user.get("is_supplier"):
-        query = insert(Product).values(name=product.name,
-                                       slug=slugify(product.name),
-                                       description=product.description,
-                                       price=product.price,
-                                       image_url=product.image_url,
-                                       stock=product.stock,
-                                       rating=0.0,
-                                       category_id=product.category,
-                                       supplied_id=get_user.get("id"))
-
-        await session.execute(query)
-        await session.commit()
+        async with uow as session:
+            query = insert(Product).values(name=product.name,
+                                           slug=slugify(product.name),
+                                           description=product.description,
+                                           price=product.price,
+                                           image_url=product.image_url,
+                                           stock=product.stock,
+                                           rating=0.0,
+                                           category_id=product.category,
+                                           supplier_id=get_user.get("id")).returning(Product.id)
+
+            product_id = await session.scalar(query)
+        await leaderboard.publish("update_product", product_id, product.category, product.stock > 0, 0.0)
+        await autocomplete.publish("products", "upsert", product_id, product.name, slugify(product.name), 0.0)
+        await events.publish(product_topics(product_id, product.category), 'product.created',
+                             {'id': product_id, 'slug': slugify(product.name), 'name': product.name,
+                              'price': product.price, 'stock': product.stock,
+                              'category_id': product.category, 'is_active': True})
 
         return {
             'status_code': status.HTTP_201_CREATED,
@@ -54,53 +113,102 @@ async def create_product(session: Annotated[AsyncSession, Depends(get_session)],
 
 
 @router.get('/{category_slug}')
-async def product_by_category(category_slug: str, session: Annotated[AsyncSession, Depends(get_session)]):
-    category = await session.scalar(select(Category).where(Category.slug == category_slug))
-    if category is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+async def product_by_category(category_slug: str, uow: Annotated[UnitOfWork, Depends(get_uow)],
+                              include: str | None = None):
+    names = parse_include(include)
+    async with uow as session:
+        category = await session.scalar(select(Category).where(Category.slug == category_slug))
+        if category is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
-    subcategories_cor = await session.scalars(select(Category).where(Category.parent_id == category.id))
-    subcategories = subcategories_cor.all()
-    indexes = [category.id] + [cat.id for cat in subcategories]
+        subcategories_cor = await session.scalars(select(Category).where(Category.parent_id == category.id))
+        subcategories = subcategories_cor.all()
+        indexes = [category.id] + [cat.id for cat in subcategories]
 
-    products = await session.scalars(
-        select(Product).where(and_(Product.category_id.in_(indexes), Product.stock > 0)))
-    return products.all()
+        products = await session.scalars(
+            with_includes(select(Product).where(and_(Product.category_id.in_(indexes), Product.stock > 0)), names))
+        products = products.all()
+    return [expand(product, names) for product in products]
 
 
 @router.get('/detail/{product_slug}')
-async def product_detail(product_slug: str, session: Annotated[AsyncSession, Depends(get_session)]):
-    query = select(Product).where(Product.slug == product_slug)
-    product_cor = await session.scalars(query)
-    product = product_cor.first()
+async def product_detail(product_slug: str, uow: Annotated[UnitOfWork, Depends(get_uow)],
+                         include: str | None = None):
+    names = parse_include(include)
+    async with uow as session:
+        query = with_includes(select(Product).where(Product.slug == product_slug), names)
+        product_cor = await session.scalars(query)
+        product = product_cor.first()
 
     if product is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There are no product")
 
-    return product
+    return expand(product, names)
+
+
+@router.get('/{product_slug}/related')
+async def related_products(product_slug: str, uow: Annotated[UnitOfWork, Depends(get_uow)]):
+    async with uow as session:
+        product = await session.scalar(select(Product).where(Product.slug == product_slug))
+        if product is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There are no product")
+
+        related = await session.scalars(
+            select(Product)
+            .join(RelatedProduct, RelatedProduct.related_id == Product.id)
+            .where(and_(RelatedProduct.product_id == product.id, Product.is_active))
+            .order_by(RelatedProduct.rank))
+        return related.all()
+
+
+@router.get('/{product_slug}/events')
+async def product_events(product_slug: str, uow: Annotated[UnitOfWork, Depends(get_uow)]):
+    async with uow as session:
+        product = await session.scalar(select(Product).where(Product.slug == product_slug))
+    if product is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There are no product")
+
+    async def snapshot():
+        async with async_session_maker() as session:
+            current = await session.get(Product, product.id)
+        return [{'event': 'product', 'data': product_state(current)}] if current is not None else []
+
+    return StreamingResponse(events.stream(product_topics(product.id), snapshot),
+                             media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
 @router.put('/detail/{product_slug}')
-async def update_product(product_slug: str, session: Annotated[AsyncSession, Depends(get_session)],
+async def update_product(product_slug: str, uow: Annotated[UnitOfWork, Depends(get_uow)],
                          new_product: CreateProduct,
                          get_user: Annotated[dict, Depends(get_current_user)]):
     if get_user.get("is_admin") or get_user.get("is_supplier"):
-        query = select(Product).where(Product.slug == product_slug)
-        product_cor = await session.scalars(query)
-        product = product_cor.first()
+        async with uow as session:
+            query = select(Product).where(Product.slug == product_slug)
+            product_cor = await session.scalars(query)
+            product = product_cor.first()
 
-        if product is None:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There are no product")
+            if product is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There are no product")
 
-        query = update(Product).where(Product.slug == product_slug).values(name=new_product.name,
-                                                                           description=new_product.description,
-                                                                           price=new_product.price,
-                                                                           image_url=new_product.image_url,
-                                                                           stock=new_product.stock,
-                                                                           category_id=new_product.category)
+            # The UPDATE below synchronizes the loaded product, so read the old category first.
+            old_category_id = product.category_id
+            query = update(Product).where(Product.slug == product_slug).values(name=new_product.name,
+                                                                               description=new_product.description,
+                                                                               price=new_product.price,
+                                                                               image_url=new_product.image_url,
+                                                                               stock=new_product.stock,
+                                                                               category_id=new_product.category)
 
-        await session.execute(query)
-        await session.commit()
+            await session.execute(query)
+        await leaderboard.publish("update_product", product.id, new_product.category,
+                                  bool(product.is_active) and new_product.stock > 0)
+        if product.is_active:
+            await autocomplete.publish("products", "upsert", product.id, new_product.name, product.slug)
+        await events.publish(product_topics(product.id, old_category_id, new_product.category), 'product.updated',
+                             {'id': product.id, 'slug': product.slug, 'name': new_product.name,
+                              'price': new_product.price, 'stock': new_product.stock,
+                              'category_id': new_product.category, 'is_active': product.is_active})
 
         return {'status_code': status.HTTP_200_OK,
                 'transaction': 'Product update is successful'}
@@ -112,19 +220,24 @@ async def update_product(product_slug: str, session: Annotated[AsyncSession, Dep
 
 
 @router.delete('/delete')
-async def delete_product(product_slug: str, session: Annotated[AsyncSession, Depends(get_session)],
+async def delete_product(product_slug: str, uow: Annotated[UnitOfWork, Depends(get_uow)],
                          get_user: Annotated[dict, Depends(get_current_user)]):
     if get_user.get("is_admin") or get_user.get("is_supplier"):
-        query = select(Product).where(Product.slug == product_slug)
-        product_cor = await session.scalars(query)
-        product = product_cor.first()
+        async with uow as session:
+            query = select(Product).where(Product.slug == product_slug)
+            product_cor = await session.scalars(query)
+            product = product_cor.first()
 
-        if product is None:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There are no product")
+            if product is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There are no product")
 
-        query = update(Product).where(Product.slug == product_slug).values(is_active=False)
-        await session.execute(query)
-        await session.commit()
+            query = update(Product).where(Product.slug == product_slug).values(is_active=False,
+                                                                               deleted_at=datetime.now())
+            await session.execute(query)
+        await leaderboard.publish("remove", product.id)
+        await autocomplete.publish("products", "remove", product.id)
+        await events.publish(product_topics(product.id, product.category_id), 'product.deleted',
+                             {'id': product.id, 'slug': product.slug})
 
         return {'status_code': status.HTTP_200_OK,
                 'transaction': 'Product delete is successful'}
@@ -133,3 +246,46 @@ async def delete_product(product_slug: str, session: Annotated[AsyncSession, Dep
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='You are not authorized to use this method'
         )
+
+
+@router.post('/{product_slug}/image')
+async def upload_product_image(product_slug: str, uow: Annotated[UnitOfWork, Depends(get_uow)],
+                               image: UploadFile,
+                               get_user: Annotated[dict, Depends(get_current_user)]):
+    if get_user.get("is_admin") or get_user.get("is_supplier"):
+        async with uow as session:
+            product: Product = await session.scalar(select(Product).where(Product.slug == product_slug))
+            if product is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There are no product")
+
+        data = await image.read(settings.IMAGE_MAX_BYTES + 1)
+        if len(data) > settings.IMAGE_MAX_BYTES:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Image is too large")
+
+        try:
+            image_format, thumbnails = await render_thumbnails(data)
+        except Image.DecompressionBombError:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Image has too many pixels")
+        except (UnidentifiedImageError, OSError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File is not a supported image")
+        if image_format not in CONTENT_TYPES:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File is not a supported image")
+
+        prefix = f"products/{product.id}/{hashlib.sha256(data).hexdigest()[:20]}"
+        original_key = f"{prefix}/original.{image_format}"
+        await storage.save(original_key, data, CONTENT_TYPES[image_format])
+        for size, thumbnail in thumbnails.items():
+            await storage.save(f"{prefix}/{size}.webp", thumbnail, CONTENT_TYPES["webp"])
+
+        async with uow as session:
+            await session.execute(update(Product).where(Product.id == product.id)
+                                  .values(image_url=storage.url(original_key)))
+
+        return {'status_code': status.HTTP_201_CREATED,
+                'image_url': storage.url(original_key),
+                'thumbnails': {size: storage.url(f"{prefix}/{size}.webp") for size in thumbnails}}
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='You are not authorized to use this method'
+        )
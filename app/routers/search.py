@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Query
+from typing import Annotated
+
+from app.backend import autocomplete
+from app.backend.config import settings
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("/autocomplete")
+async def autocomplete_suggestions(q: Annotated[str, Query(max_length=100)],
+                                   limit: Annotated[int, Query(ge=1, le=settings.AUTOCOMPLETE_LIMIT)] = 5):
+    products = autocomplete.products
+    categories = autocomplete.categories
+    return {
+        'products': [{'id': product_id,
+                      'name': products.documents[product_id].name,
+                      'slug': products.documents[product_id].slug,
+                      'rating': products.weight(product_id)}
+                     for product_id in products.search(q, limit)],
+        'categories': [{'id': category_id,
+                        'name': categories.documents[category_id].name,
+                        'slug': categories.documents[category_id].slug}
+                       for category_id in categories.search(q, limit)],
+    }
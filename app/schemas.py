@@ -27,3 +27,8 @@ class CreateReview(BaseModel):
     product_slug: str
     grade: int
     comment: str
+
+
+class RestoreArchived(BaseModel):
+    table: str
+    ids: list[int]
@@ -0,0 +1,67 @@
+"""Check query_stats.fingerprint against SQL as the asyncpg dialect compiles it.
+
+    python -m scripts.check_fingerprints
+
+Needs no database. Each case compiles real statements the way the app's engine sends them, with
+"$n::TYPE" binds and expanded IN lists, and exits non-zero when a fingerprint is not the expected one.
+"""
+import sys
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg
+
+import app.main  # noqa: F401  (configures every mapper)
+from app.backend.query_stats import fingerprint
+from app.models.outbox import OutboxEvent
+from app.models.products import Product
+
+DIALECT = asyncpg.dialect()
+
+
+def compiled(statement) -> str:
+    return str(statement.compile(dialect=DIALECT, compile_kwargs={"render_postcompile": True}))
+
+
+CASES = [
+    (
+        "IN lists of any length share one fingerprint",
+        [select(Product.id).where(Product.id.in_(ids), Product.name == "x") for ids in ([1], [1, 2, 3], list(range(50)))],
+        "SELECT products.id FROM products WHERE products.id IN (...) AND products.name = ?",
+    ),
+    (
+        "multi-word casts are stripped",
+        [select(OutboxEvent.id).where(OutboxEvent.available_at < datetime(2024, 1, day)) for day in (1, 2)],
+        "SELECT outbox.id FROM outbox WHERE outbox.available_at < ?",
+    ),
+    (
+        "string IN lists and float binds",
+        [select(Product.id).where(Product.rating > rating, Product.slug.in_(slugs))
+         for rating, slugs in ((1.5, ["a"]), (4.0, ["a", "b", "c"]))],
+        "SELECT products.id FROM products WHERE products.rating > ? AND products.slug IN (...)",
+    ),
+]
+
+RAW = [
+    ("literal casts", "SELECT (random() * 4)::int, '{1,2}'::INTEGER[], 1.5::NUMERIC(10, 2)", "SELECT (random() * ?), ?, ?"),
+    ("named parameters", "SELECT * FROM products WHERE id IN (:id_1, :id_2) AND slug = :slug", "SELECT * FROM products WHERE id IN (...) AND slug = ?"),
+]
+
+
+def main() -> int:
+    failures = 0
+    checks = [(name, [compiled(statement) for statement in statements], expected)
+              for name, statements, expected in CASES]
+    checks += [(name, [statement], expected) for name, statement, expected in RAW]
+    for name, statements, expected in checks:
+        for statement in statements:
+            actual = fingerprint(statement)
+            if actual != expected:
+                failures += 1
+                print(f"FAIL {name}\n  sql:      {' '.join(statement.split())}\n  got:      {actual}\n  expected: {expected}")
+    print(f"{failures} statement(s) failed" if failures else f"all {len(checks)} cases passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
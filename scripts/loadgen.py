@@ -0,0 +1,87 @@
+"""Small HTTP load generator for local checks against a running app.
+
+    python -m scripts.loadgen --url http://localhost:8000 --token <admin token> --duration 30
+
+Fires concurrent GETs at the given paths, samples /admin/pool while running, and prints
+request latency percentiles together with connection-pool occupancy.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+DEFAULT_PATHS = ["/products/", "/category/all_categories", "/reviews/", "/auth/read_current_user"]
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run(url: str, token: str, paths: list[str], concurrency: int, duration: float,
+              stop: asyncio.Event | None = None) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    samples: list[dict] = []
+    deadline = time.monotonic() + duration
+    stop = stop or asyncio.Event()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        async def worker(offset: int):
+            nonlocal errors
+            i = offset
+            while time.monotonic() < deadline and not stop.is_set():
+                path = paths[i % len(paths)]
+                i += 1
+                started = time.perf_counter()
+                try:
+                    # The auth path is hit without a token on purpose: it must fail before touching the database.
+                    response = await client.get(path, headers=None if path.startswith("/auth") else headers)
+                    if response.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        async def sampler():
+            while time.monotonic() < deadline and not stop.is_set():
+                response = await client.get("/admin/pool", headers=headers)
+                if response.status_code == 200:
+                    samples.append(response.json())
+                await asyncio.sleep(0.5)
+
+        await asyncio.gather(sampler(), *(worker(n) for n in range(concurrency)))
+
+    occupancy = [sample["checked_out"] for sample in samples]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0) * 1000, 2),
+        "pool_checked_out_avg": round(statistics.mean(occupancy), 2) if occupancy else None,
+        "pool": samples[-1] if samples else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url, args.token, args.paths or DEFAULT_PATHS, args.concurrency, args.duration))
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
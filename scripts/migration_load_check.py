@@ -0,0 +1,86 @@
+"""Run Alembic migrations against a seeded database while measuring request latency.
+
+    python -m scripts.migration_load_check --token <admin token> --seed --rows 2000000 --downgrade-to -1
+
+Needs the app running at --url against the same database as alembic.ini. The script seeds
+products, ratings and reviews (with --seed), measures a latency baseline, then downgrades and
+re-upgrades the migrations under the same load and prints both measurements side by side.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from sqlalchemy import text
+
+from app.backend.db import engine
+from scripts import loadgen
+
+
+async def seed(rows: int):
+    async with engine.begin() as connection:
+        await connection.execute(text(
+            "INSERT INTO categories (name, slug, is_active) VALUES ('Load', 'load-test', true) "
+            "ON CONFLICT (slug) DO NOTHING"))
+        await connection.execute(text(
+            "INSERT INTO users (username, email, is_active, is_customer) "
+            "SELECT 'load-user-' || g, 'load-user-' || g || '@example.com', true, true "
+            "FROM generate_series(1, 1000) g ON CONFLICT DO NOTHING"))
+        await connection.execute(text(
+            "INSERT INTO products (name, slug, description, price, stock, rating, is_active, category_id) "
+            "SELECT 'Load product ' || g, 'load-product-' || g, 'seeded', 100, 10, 0, true, "
+            "(SELECT id FROM categories WHERE slug = 'load-test') "
+            "FROM generate_series(1, :rows) g ON CONFLICT (slug) DO NOTHING"), {"rows": rows})
+        await connection.execute(text(
+            "INSERT INTO ratings (grade, user_id, product_id, is_active) "
+            "SELECT 1 + (random() * 4)::int, u.id, p.id, true "
+            "FROM (SELECT id FROM products WHERE slug LIKE 'load-product-%' ORDER BY id LIMIT :rows) p "
+            "CROSS JOIN LATERAL (SELECT id FROM users WHERE username LIKE 'load-user-%' "
+            "ORDER BY random() + p.id LIMIT 1) u"), {"rows": rows})
+        await connection.execute(text(
+            "INSERT INTO reviews (user_id, product_id, rating_id, comment, is_active) "
+            "SELECT user_id, product_id, id, 'seeded', true FROM ratings r "
+            "WHERE NOT EXISTS (SELECT 1 FROM reviews v WHERE v.rating_id = r.id)"))
+    await engine.dispose()
+
+
+async def alembic(*args: str) -> float:
+    started = time.monotonic()
+    process = await asyncio.create_subprocess_exec(sys.executable, "-m", "alembic", *args)
+    if await process.wait() != 0:
+        raise SystemExit(f"alembic {' '.join(args)} failed")
+    return time.monotonic() - started
+
+
+async def main(args):
+    if args.seed:
+        await seed(args.rows)
+
+    baseline = await loadgen.run(args.url, args.token, args.paths, args.concurrency, args.baseline)
+
+    stop = asyncio.Event()
+    load = asyncio.create_task(loadgen.run(args.url, args.token, args.paths, args.concurrency, 3600, stop))
+    downgrade = await alembic("downgrade", args.downgrade_to)
+    upgrade = await alembic("upgrade", "head")
+    stop.set()
+    during = await load
+
+    print(f"downgrade: {downgrade:.1f}s, upgrade: {upgrade:.1f}s")
+    for key in ("requests", "errors", "p50_ms", "p99_ms", "max_ms"):
+        print(f"{key:>10}: baseline {baseline[key]:>10}  during migration {during[key]:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--downgrade-to", default="-1")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--baseline", type=float, default=15)
+    args = parser.parse_args()
+    args.paths = args.paths or ["/products/detail/load-product-1", "/reviews/load-product-1",
+                                "/products/load-product-1/related"]
+    asyncio.run(main(args))